@@ -1,14 +1,37 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, render_template_string
+from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, g, has_request_context, Response, make_response, stream_with_context
+from flask.logging import default_handler
+from werkzeug.http import is_resource_modified, parse_content_range_header
+from itsdangerous import URLSafeTimedSerializer, BadSignature
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
+from sqlalchemy import func, tuple_, select, insert, event, text, DDL, bindparam, literal
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import selectinload
+from sqlalchemy.exc import IntegrityError
+from datetime import date, datetime, timedelta, timezone
 from functools import wraps
+from collections import OrderedDict, Counter
+import click
 import os
 from dotenv import load_dotenv
 import logging
-from flask_migrate import Migrate
+import logging.handlers
+import atexit
 import uuid
-import boto3
+import io
+import re
+import json
+import csv
+import hashlib
+import queue
+import time
+import random
+import base64
+import unicodedata
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 # Cargar variables de entorno desde .env
 load_dotenv()
@@ -18,9 +41,47 @@ app.secret_key = os.getenv("SECRET_KEY", "default_secret_key")
 app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv("SQLALCHEMY_DATABASE_URI")
 app.config["UPLOAD_FOLDER"] = os.getenv("UPLOAD_FOLDER", os.path.join("static", "uploads"))
 app.config["MAX_CONTENT_LENGTH"] = 32 * 1024 * 1024  # 32 MB, puedes ajustar este valor
+app.config["FEED_PAGE_SIZE"] = int(os.getenv("FEED_PAGE_SIZE", 20))  # Publicaciones por página del feed
+app.config["FEED_CACHE_URL"] = os.getenv("FEED_CACHE_URL")  # redis://... para compartir la caché entre workers
+app.config["FEED_CACHE_SIZE"] = int(os.getenv("FEED_CACHE_SIZE", 2000))  # Entradas máximas de la caché en memoria
+app.config["FEED_CACHE_TTL"] = int(os.getenv("FEED_CACHE_TTL", 60))  # Segundos
+app.config["SLOW_REQUEST_MS"] = int(os.getenv("SLOW_REQUEST_MS", 0))  # Loguear el SQL de peticiones más lentas (0 = desactivado)
+app.config["EVENTS_URL"] = os.getenv("EVENTS_URL")  # redis://... para repartir eventos en vivo entre workers
+app.config["SSE_KEEPALIVE"] = int(os.getenv("SSE_KEEPALIVE", 15))  # Segundos entre comentarios keepalive del stream
+app.config["METRICS_TOKEN"] = os.getenv("METRICS_TOKEN")  # Si se define, /metrics exige "Authorization: Bearer <token>"
+app.config["LOG_LEVEL"] = os.getenv("LOG_LEVEL", "INFO")
+app.config["LOG_FILE"] = os.getenv("LOG_FILE")  # p. ej. app.log; sin definir, los logs van solo a stderr
+app.config["LOG_MAX_BYTES"] = int(os.getenv("LOG_MAX_BYTES", 10 * 1024 * 1024))  # Tamaño al que rota LOG_FILE
+app.config["LOG_BACKUP_COUNT"] = int(os.getenv("LOG_BACKUP_COUNT", 5))  # Archivos rotados que se conservan
+app.config["LOG_CONSOLE"] = os.getenv("LOG_CONSOLE", "1") != "0"  # Escribir también en stderr
 
 db = SQLAlchemy(app)
-migrate = Migrate(app, db)
+
+# boto3, Pillow y Flask-Migrate (alembic) son los imports más pesados y no los
+# usa cada proceso: se importan recién cuando hacen falta. Ver benchmarks/startup.py.
+migrate = None
+
+def init_migrations():
+    """Registra Flask-Migrate; solo lo necesitan los comandos `flask db ...`."""
+    global migrate
+    if migrate is None:
+        from flask_migrate import Migrate
+        migrate = Migrate(app, db)
+    return migrate
+
+# El CLI de flask importa la app dentro de un contexto de click; los workers web no
+if click.get_current_context(silent=True) is not None:
+    init_migrations()
+
+def preload_runtime_modules():
+    """Importa de antemano los módulos pesados que esta configuración va a usar.
+
+    wsgi.py lo llama en el master de gunicorn (preload_app), así los workers
+    comparten esa memoria por copy-on-write en vez de importarlos cada uno.
+    """
+    import PIL.Image  # noqa: F401  (procesamiento de imágenes)
+    if STORAGE_BACKEND == "s3":
+        import boto3.s3.transfer  # noqa: F401
 
 
 # ---------- MODELOS ----------
@@ -39,20 +100,173 @@ class Post(db.Model):
     descripcion = db.Column(db.Text)
     score = db.Column(db.Integer, default=2)
     solucionado = db.Column(db.Boolean, default=False)  # Nuevo campo
-    likes = db.relationship("Like", backref="post", lazy=True)
-    comments = db.relationship("Comment", backref="post", lazy=True)
+    solved_at = db.Column(db.DateTime)  # Cuándo se marcó como solucionado (None en filas antiguas)
+    # Contadores desnormalizados, se actualizan en la misma transacción que Like/Comment
+    like_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    comment_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    # Versiones redimensionadas de la imagen: {"webp": {ancho: ruta}, "jpeg": {ancho: ruta}, "thumb": ruta}.
+    # Sin procesar es NULL de SQL (no el null de JSON) para poder filtrar con IS NULL
+    image_renditions = db.Column(db.JSON(none_as_null=True))
+    # SHA-256 de la imagen original (ImageBlob); None en filas anteriores a la deduplicación
+    image_hash = db.Column(db.String(64), index=True)
+
+    __table_args__ = (
+        # Cubre los filtros y el orden del feed en index()
+        db.Index(
+            "ix_post_feed", "solucionado", "descripcion", "score", "like_count", "id",
+            mysql_length={"descripcion": 50},
+        ),
+        # El feed sin filtro de tipo ("todos") no puede ordenar con el anterior
+        db.Index("ix_post_feed_todos", "solucionado", "score", "like_count", "id"),
+        # AUTOINCREMENT: SQLite no vuelve a entregar los ids de las filas archivadas
+        {"sqlite_autoincrement": True},
+    )
+    # La base borra likes y comentarios junto con la publicación (ON DELETE CASCADE);
+    # passive_deletes evita que el ORM los cargue para ponerles post_id = NULL
+    likes = db.relationship("Like", backref="post", lazy=True, passive_deletes=True)
+    comments = db.relationship("Comment", backref="post", lazy=True, passive_deletes=True)
+    archived = False
 
 class Like(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    post_id = db.Column(db.Integer, db.ForeignKey("post.id"))
+    post_id = db.Column(db.Integer, db.ForeignKey("post.id", ondelete="CASCADE"))
     username = db.Column(db.String(50))
 
+    __table_args__ = (
+        # Un usuario solo puede dar un like por publicación
+        db.UniqueConstraint("post_id", "username", name="uq_like_post_username"),
+        {"sqlite_autoincrement": True},
+    )
+
 class Comment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    post_id = db.Column(db.Integer, db.ForeignKey("post.id"))
+    post_id = db.Column(db.Integer, db.ForeignKey("post.id", ondelete="CASCADE"), index=True)
+    username = db.Column(db.String(50))
+    text = db.Column(db.String(300))
+
+    __table_args__ = ({"sqlite_autoincrement": True},)
+
+# ---------- Archivo ----------
+# Copias de Post/Like/Comment para los reportes solucionados antiguos que
+# `flask archive-solved` saca de las tablas activas. Mismas columnas (y mismos
+# ids), así que las filas se mueven con INSERT ... SELECT en ambos sentidos.
+# Las tablas activas no reutilizan ids (AUTOINCREMENT en SQLite; en MySQL el
+# contador de InnoDB solo retrocede al reiniciar una versión anterior a 8.0).
+class ArchivedPost(db.Model):
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    title = db.Column(db.String(200))
+    image_path = db.Column(db.String(300))
+    created_at = db.Column(db.DateTime)
+    username = db.Column(db.String(50))
+    descripcion = db.Column(db.Text)
+    score = db.Column(db.Integer)
+    solucionado = db.Column(db.Boolean)
+    solved_at = db.Column(db.DateTime)
+    like_count = db.Column(db.Integer, nullable=False, default=0)
+    comment_count = db.Column(db.Integer, nullable=False, default=0)
+    image_renditions = db.Column(db.JSON(none_as_null=True))
+    image_hash = db.Column(db.String(64), index=True)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Mismo orden que el feed de solucionados
+        db.Index(
+            "ix_archived_post_feed", "descripcion", "score", "like_count", "id",
+            mysql_length={"descripcion": 50},
+        ),
+        db.Index("ix_archived_post_feed_todos", "score", "like_count", "id"),
+    )
+    comments = db.relationship(
+        "ArchivedComment", primaryjoin="ArchivedPost.id == foreign(ArchivedComment.post_id)",
+        order_by="ArchivedComment.id", lazy=True,
+    )
+    archived = True
+
+class ArchivedLike(db.Model):
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    post_id = db.Column(db.Integer, index=True)
+    username = db.Column(db.String(50))
+
+class ArchivedComment(db.Model):
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    post_id = db.Column(db.Integer, index=True)
     username = db.Column(db.String(50))
     text = db.Column(db.String(300))
 
+class FeedVersion(db.Model):
+    """Versión de cada combinación de filtros del feed (tipo de riesgo, solucionado).
+
+    Se incrementa en la misma transacción que cualquier cambio visible en ese
+    feed y se usa para el ETag/Last-Modified de la página.
+    """
+    risk_type = db.Column(db.String(100), primary_key=True)
+    solucionado = db.Column(db.Boolean, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+class ImageBlob(db.Model):
+    """Imagen original identificada por su SHA-256 y cuántas publicaciones la usan."""
+    sha256 = db.Column(db.String(64), primary_key=True)
+    size = db.Column(db.BigInteger, nullable=False)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+class RiskStat(db.Model):
+    """Resumen de publicaciones por tipo de riesgo, estado y semana de creación.
+
+    Lo mantienen las mismas transacciones que crean, resuelven, puntúan o borran
+    publicaciones; /dashboard lee solo esta tabla.
+    """
+    risk_type = db.Column(db.String(100), primary_key=True)
+    solucionado = db.Column(db.Boolean, primary_key=True)
+    week = db.Column(db.Date, primary_key=True)  # lunes de la semana (UTC)
+    post_count = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Integer, nullable=False, default=0)
+
+def bump_feed_version(risk_type, solucionado):
+    """Incrementa la versión del filtro del post y la de "todos" dentro de la transacción actual."""
+    now = datetime.utcnow()
+    for risk_filter in {risk_type, "todos"}:
+        query = FeedVersion.query.filter_by(risk_type=risk_filter, solucionado=bool(solucionado))
+        values = {FeedVersion.version: FeedVersion.version + 1, FeedVersion.updated_at: now}
+        if query.update(values, synchronize_session=False):
+            continue
+        try:
+            with db.session.begin_nested():
+                db.session.add(FeedVersion(
+                    risk_type=risk_filter, solucionado=bool(solucionado), version=1, updated_at=now
+                ))
+        except IntegrityError:
+            # Otra transacción creó la fila entre medio
+            query.update(values, synchronize_session=False)
+
+def bump_all_feed_versions():
+    """Incrementa la versión de todos los filtros, creando las filas que todavía no existen."""
+    for risk_type, _, _ in RISK_TYPES:
+        for solucionado in (False, True):
+            bump_feed_version(risk_type, solucionado)
+
+def touch_post(post_id):
+    """Registra en la transacción actual que cambió el post y devuelve sus filtros (o None)."""
+    row = db.session.query(Post.descripcion, Post.solucionado).filter_by(id=post_id).first()
+    if row is not None:
+        bump_feed_version(row.descripcion, row.solucionado)
+    return row
+
+def bump_counter(post_id, column, delta):
+    """Suma delta al contador de la publicación con un UPDATE atómico (sin leer antes)."""
+    Post.query.filter_by(id=post_id).update({column: column + delta}, synchronize_session=False)
+
+def add_like(post_id, username):
+    """Inserta el like; devuelve False si ya existía (lo garantiza la restricción UNIQUE)."""
+    try:
+        with db.session.begin_nested():
+            db.session.add(Like(post_id=post_id, username=username))
+    except IntegrityError:
+        return False
+    bump_counter(post_id, Post.like_count, 1)
+    return True
+
 def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
@@ -62,37 +276,774 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+# ---------- LOGGING ----------
+# Los registros se formatean como una línea JSON en el hilo que loguea (ahí están
+# la petición y la sesión) y se encolan; un hilo aparte los escribe en stderr y,
+# si se define LOG_FILE, en un archivo que rota por tamaño. Así ninguna petición
+# espera a que termine una escritura a disco.
+class JsonFormatter(logging.Formatter):
+    """Una línea JSON por registro, con los datos de la petición en curso si la hay."""
+
+    EXTRA_FIELDS = ("method", "path", "status", "duration_ms")
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "process": record.process,
+            "thread": record.threadName,
+        }
+        if has_request_context():
+            entry["request_id"] = g.get("request_id")
+            entry["route"] = request.url_rule.rule if request.url_rule else None
+            # Leer la sesión solo si la ruta ya la usó; si no, la respuesta ganaría "Vary: Cookie"
+            if session.accessed:
+                entry["user"] = session.get("username")
+        for field in self.EXTRA_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack_info"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def _log_writers():
+    """Handlers que escriben de verdad; los usa el hilo del QueueListener."""
+    handlers = []
+    if app.config["LOG_CONSOLE"]:
+        handlers.append(logging.StreamHandler())
+    if app.config["LOG_FILE"]:
+        handlers.append(logging.handlers.RotatingFileHandler(
+            app.config["LOG_FILE"],
+            maxBytes=app.config["LOG_MAX_BYTES"],
+            backupCount=app.config["LOG_BACKUP_COUNT"],
+            encoding="utf-8",
+        ))
+    return handlers
+
+_log_handler = None
+_log_listener = None
+
+def _start_log_listener():
+    global _log_listener
+    _log_handler.queue = queue.SimpleQueue()
+    _log_listener = logging.handlers.QueueListener(
+        _log_handler.queue, *_log_writers(), respect_handler_level=True
+    )
+    _log_listener.start()
+
+def _stop_log_listener():
+    # Escribe lo que quede en la cola antes de salir
+    if _log_listener is not None:
+        _log_listener.stop()
+
+def configure_logging():
+    """Envía el logging de todo el proceso (app, werkzeug, sqlalchemy...) a la cola."""
+    global _log_handler
+    if _log_handler is not None:
+        return
+    _log_handler = logging.handlers.QueueHandler(queue.SimpleQueue())
+    _log_handler.setFormatter(JsonFormatter())
+    root = logging.getLogger()
+    root.addHandler(_log_handler)
+    root.setLevel(app.config["LOG_LEVEL"].upper())
+    app.logger.removeHandler(default_handler)
+    _start_log_listener()
+    atexit.register(_stop_log_listener)
+    # El hilo escritor no sobrevive al fork de los workers de gunicorn (preload_app):
+    # cada hijo arranca el suyo con una cola nueva
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=_start_log_listener)
+
+configure_logging()
+access_logger = logging.getLogger("app.access")
+
+@app.before_request
+def assign_request_id():
+    # Se respeta el id que ponga el proxy para poder seguir la petición de punta a punta
+    g.request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+
+@app.after_request
+def log_request(response):
+    response.headers.setdefault("X-Request-ID", g.get("request_id", ""))
+    started = g.get("request_started")
+    access_logger.info(
+        "%s %s %s", request.method, request.path, response.status_code,
+        extra={
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 2) if started else None,
+        },
+    )
+    return response
+
+
+# ---------- MÉTRICAS ----------
+# Registro en memoria con formato de exposición de Prometheus. Cada worker de
+# gunicorn tiene el suyo: Prometheus debe agregarlos por instancia.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (64 * 1024, 256 * 1024, 1024 * 1024, 4 * 1024 * 1024, 8 * 1024 * 1024, 16 * 1024 * 1024, 32 * 1024 * 1024)
+MAX_LOGGED_STATEMENTS = 50
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help = {}
+        self._counters = {}
+        self._histograms = {}
+
+    def describe(self, name, kind, help_text, buckets=None):
+        self._help[name] = (kind, help_text, buckets)
+
+    def inc(self, name, labels, amount=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        buckets = self._help[name][2]
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = {"buckets": [0] * len(buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    hist["buckets"][i] += 1
+            hist["sum"] += value
+            hist["count"] += 1
+
+    @staticmethod
+    def _labels(pairs):
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for name, (kind, help_text, buckets) in sorted(self._help.items()):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                if kind == "counter":
+                    for (metric, labels), value in sorted(self._counters.items()):
+                        if metric == name:
+                            lines.append(f"{name}{self._labels(labels)} {value}")
+                    continue
+                for (metric, labels), hist in sorted(self._histograms.items()):
+                    if metric != name:
+                        continue
+                    for bound, count in zip(buckets, hist["buckets"]):
+                        lines.append(f"{name}_bucket{self._labels(labels + (('le', bound),))} {count}")
+                    lines.append(f"{name}_bucket{self._labels(labels + (('le', '+Inf'),))} {hist['count']}")
+                    lines.append(f"{name}_sum{self._labels(labels)} {hist['sum']}")
+                    lines.append(f"{name}_count{self._labels(labels)} {hist['count']}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+metrics.describe("http_requests_total", "counter", "Peticiones HTTP atendidas.")
+metrics.describe("http_request_duration_seconds", "histogram", "Duración de las peticiones HTTP.", LATENCY_BUCKETS)
+metrics.describe("db_time_per_request_seconds", "histogram", "Tiempo en la base de datos por petición.", LATENCY_BUCKETS)
+metrics.describe("db_queries_per_request", "histogram", "Consultas SQL por petición.", QUERY_COUNT_BUCKETS)
+metrics.describe("upload_bytes_total", "counter", "Bytes recibidos en subidas de archivos.")
+metrics.describe("upload_size_bytes", "histogram", "Tamaño de cada subida de archivos.", SIZE_BUCKETS)
+metrics.describe("save_image_duration_seconds", "histogram", "Tiempo dentro de save_image().", LATENCY_BUCKETS)
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Se guarda en el contexto de la ejecución y no en la conexión: si la consulta
+    # falla no hay after_cursor_execute y el contexto se descarta con ella
+    if context is not None:
+        context._query_start_time = time.perf_counter()
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_query_start_time", None)
+    # Las consultas de los hilos de fondo (procesamiento de imágenes) no cuentan
+    if started is None or not has_request_context() or "request_started" not in g:
+        return
+    elapsed = time.perf_counter() - started
+    g.db_queries += 1
+    g.db_time += elapsed
+    if app.config["SLOW_REQUEST_MS"] and len(g.db_statements) < MAX_LOGGED_STATEMENTS:
+        g.db_statements.append((elapsed, statement))
+
+@app.before_request
+def start_request_metrics():
+    g.request_started = time.perf_counter()
+    g.db_queries = 0
+    g.db_time = 0.0
+    g.db_statements = []
+
+@app.after_request
+def record_request_metrics(response):
+    if "request_started" not in g:
+        return response
+    elapsed = time.perf_counter() - g.request_started
+    endpoint = request.endpoint or "desconocido"
+    labels = {"endpoint": endpoint, "method": request.method}
+    metrics.inc("http_requests_total", {**labels, "status": response.status_code})
+    metrics.observe("http_request_duration_seconds", labels, elapsed)
+    metrics.observe("db_time_per_request_seconds", labels, g.db_time)
+    metrics.observe("db_queries_per_request", labels, g.db_queries)
+    if request.mimetype == "multipart/form-data" and request.content_length:
+        metrics.inc("upload_bytes_total", {"endpoint": endpoint}, request.content_length)
+        metrics.observe("upload_size_bytes", {"endpoint": endpoint}, request.content_length)
+    slow_ms = app.config["SLOW_REQUEST_MS"]
+    if slow_ms and elapsed * 1000 >= slow_ms:
+        statements = "\n".join(f"  [{t * 1000:.1f} ms] {sql}" for t, sql in g.db_statements)
+        app.logger.warning(
+            "Petición lenta %s %s: %.0f ms, %d consultas SQL (%.0f ms)\n%s",
+            request.method, request.path, elapsed * 1000, g.db_queries, g.db_time * 1000, statements,
+        )
+    return response
+
+
 # Configuración de entorno y S3
 env = os.getenv("FLASK_ENV", "development")
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local")  # "local" o "s3"
 S3_BUCKET = os.getenv("S3_BUCKET")
 S3_REGION = os.getenv("S3_REGION")
 S3_ACCESS_KEY = os.getenv("S3_ACCESS_KEY")
 S3_SECRET_KEY = os.getenv("S3_SECRET_KEY")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")  # Para MinIO/moto u otro servicio compatible con S3
+S3_PUBLIC_URL = os.getenv("S3_PUBLIC_URL")  # Base pública de las imágenes (CDN), opcional
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", 10))
 
-def save_image(file):
-    ext = os.path.splitext(file.filename)[1]
-    unique_filename = f"{uuid.uuid4().hex}{ext}"
-    if True: #env == "development":
-        # Guardar localmente
-        full_path = os.path.join(app.config["UPLOAD_FOLDER"], unique_filename)
-        file.save(full_path)
-        return os.path.join("uploads", unique_filename)
-    else:
-        # Guardar en S3
-        s3 = boto3.client(
-            "s3",
-            region_name=S3_REGION,
-            aws_access_key_id=S3_ACCESS_KEY,
-            aws_secret_access_key=S3_SECRET_KEY
+COPY_CHUNK_SIZE = 1024 * 1024
+# Subidas directas: tamaño máximo de la imagen, vigencia de la URL/token y
+# tamaño de cada trozo en la subida por partes del modo local
+UPLOAD_MAX_SIZE = int(os.getenv("UPLOAD_MAX_SIZE", 32 * 1024 * 1024))
+UPLOAD_TOKEN_MAX_AGE = int(os.getenv("UPLOAD_TOKEN_MAX_AGE", 3600))
+UPLOAD_CHUNK_SIZE = 4 * 1024 * 1024
+# Tipos de imagen aceptados y la extensión con la que se guardan: la extensión
+# nunca sale del nombre que manda el cliente
+IMAGE_EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/webp": ".webp",
+    "image/gif": ".gif",
+}
+
+
+# ---------- ALMACENAMIENTO ----------
+# Las imágenes se guardan bajo claves del tipo "uploads/<nombre>", iguales para
+# todos los backends; cada backend sabe cómo abrirlas, borrarlas y generar su URL.
+class LocalStorage:
+    """Guarda los archivos en UPLOAD_FOLDER y los sirve como archivos estáticos."""
+
+    def __init__(self, folder):
+        self.folder = folder
+
+    def _path(self, key):
+        return os.path.join(self.folder, os.path.basename(key))
+
+    def save(self, fileobj, key, content_type=None):
+        with open(self._path(key), "wb") as out:
+            shutil.copyfileobj(fileobj, out, COPY_CHUNK_SIZE)
+        return key
+
+    def open(self, key):
+        return open(self._path(key), "rb")
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def delete_many(self, keys):
+        for key in keys:
+            self.delete(key)
+
+    def iter_objects(self):
+        """(clave, tamaño, mtime) de cada archivo de UPLOAD_FOLDER, sin listarlos todos en memoria."""
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    stat = entry.stat()
+                    yield f"uploads/{entry.name}", stat.st_size, stat.st_mtime
+
+    def url(self, key):
+        return url_for("static", filename=key)
+
+    def size(self, key):
+        """Tamaño en bytes del archivo, o None si no existe."""
+        try:
+            return os.path.getsize(self._path(key))
+        except FileNotFoundError:
+            return None
+
+    def upload_target(self, key, content_type, size):
+        # El navegador sube por partes a /uploads/<token>; la ruta completa la URL
+        return {"method": "chunked", "chunk_size": UPLOAD_CHUNK_SIZE}
+
+    def received(self, key):
+        """Bytes ya recibidos de una subida por partes sin terminar."""
+        try:
+            return os.path.getsize(self._path(key) + ".part")
+        except FileNotFoundError:
+            return 0
+
+    def append_chunk(self, key, stream, length, total):
+        """Agrega un trozo al archivo parcial copiándolo de a bloques; devuelve los bytes recibidos.
+
+        Cuando se completa el total, el archivo parcial pasa a su nombre final.
+        """
+        partial = self._path(key) + ".part"
+        with open(partial, "ab") as out:
+            remaining = length
+            while remaining > 0:
+                block = stream.read(min(COPY_CHUNK_SIZE, remaining))
+                if not block:
+                    break
+                out.write(block)
+                remaining -= len(block)
+            received = out.tell()
+        if received >= total:
+            os.replace(partial, self._path(key))
+        return received
+
+
+_s3_client = None
+_s3_client_lock = threading.Lock()
+
+def get_s3_client():
+    """Cliente S3 único por proceso; boto3 reutiliza sus conexiones HTTP entre subidas."""
+    global _s3_client
+    if _s3_client is None:
+        with _s3_client_lock:
+            if _s3_client is None:
+                import boto3
+                from botocore.config import Config as BotoConfig
+
+                _s3_client = boto3.client(
+                    "s3",
+                    region_name=S3_REGION,
+                    endpoint_url=S3_ENDPOINT_URL,
+                    aws_access_key_id=S3_ACCESS_KEY,
+                    aws_secret_access_key=S3_SECRET_KEY,
+                    config=BotoConfig(
+                        max_pool_connections=S3_MAX_POOL_CONNECTIONS,
+                        retries={"max_attempts": 3, "mode": "standard"},
+                    ),
+                )
+    return _s3_client
+
+
+class S3Storage:
+    """Guarda los archivos en un bucket S3 (o compatible) con subida multipart en streaming."""
+
+    def __init__(self, bucket, region, public_url=None):
+        from boto3.s3.transfer import TransferConfig
+
+        self.bucket = bucket
+        self.public_url = (public_url or f"https://{bucket}.s3.{region}.amazonaws.com").rstrip("/")
+        # Por encima de 8 MB la subida se parte en trozos de 8 MB que se envían a
+        # medida que se leen, sin cargar el archivo completo en memoria.
+        self.transfer_config = TransferConfig(
+            multipart_threshold=8 * 1024 * 1024,
+            multipart_chunksize=8 * 1024 * 1024,
+            max_concurrency=4,
+        )
+
+    def save(self, fileobj, key, content_type=None):
+        # Las claves son únicas, así que el objeto se puede cachear para siempre
+        extra_args = {"ACL": "public-read", "CacheControl": f"public, max-age={UPLOADS_MAX_AGE}, immutable"}
+        if content_type:
+            extra_args["ContentType"] = content_type
+        get_s3_client().upload_fileobj(
+            fileobj, self.bucket, key, ExtraArgs=extra_args, Config=self.transfer_config
+        )
+        return key
+
+    def open(self, key):
+        from botocore.exceptions import ClientError
+
+        # Archivo temporal en memoria que pasa a disco si la imagen es grande
+        tmp = tempfile.SpooledTemporaryFile(max_size=COPY_CHUNK_SIZE)
+        try:
+            get_s3_client().download_fileobj(self.bucket, key, tmp, Config=self.transfer_config)
+        except ClientError as e:
+            tmp.close()
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                raise FileNotFoundError(key) from e
+            raise
+        tmp.seek(0)
+        return tmp
+
+    def delete(self, key):
+        get_s3_client().delete_object(Bucket=self.bucket, Key=key)
+
+    def delete_many(self, keys):
+        """Borra las claves con DeleteObjects, hasta 1000 por petición."""
+        keys = list(keys)
+        for start in range(0, len(keys), 1000):
+            get_s3_client().delete_objects(
+                Bucket=self.bucket,
+                Delete={"Objects": [{"Key": key} for key in keys[start:start + 1000]], "Quiet": True},
+            )
+
+    def iter_objects(self):
+        """(clave, tamaño, mtime) de cada objeto bajo uploads/, página por página."""
+        paginator = get_s3_client().get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix="uploads/"):
+            for obj in page.get("Contents", []):
+                yield obj["Key"], obj["Size"], obj["LastModified"].timestamp()
+
+    def url(self, key):
+        return f"{self.public_url}/{key}"
+
+    def size(self, key):
+        """Tamaño en bytes del objeto, o None si no existe."""
+        from botocore.exceptions import ClientError
+
+        try:
+            return get_s3_client().head_object(Bucket=self.bucket, Key=key)["ContentLength"]
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    def upload_target(self, key, content_type, size):
+        """POST prefirmado: el navegador sube la imagen directo al bucket.
+
+        S3 rechaza la subida si no respeta el tipo declarado o supera UPLOAD_MAX_SIZE.
+        """
+        fields = {
+            "acl": "public-read",
+            "Content-Type": content_type,
+            "Cache-Control": f"public, max-age={UPLOADS_MAX_AGE}, immutable",
+        }
+        conditions = [{name: value} for name, value in fields.items()]
+        conditions.append(["content-length-range", 1, UPLOAD_MAX_SIZE])
+        presigned = get_s3_client().generate_presigned_post(
+            self.bucket, key, Fields=fields, Conditions=conditions, ExpiresIn=UPLOAD_TOKEN_MAX_AGE
         )
-        s3.upload_fileobj(
-            file,
-            S3_BUCKET,
-            unique_filename,
-            ExtraArgs={"ACL": "public-read", "ContentType": file.content_type}
+        return {"method": "POST", "url": presigned["url"], "fields": presigned["fields"]}
+
+
+_storage = None
+
+def get_storage():
+    """Backend de almacenamiento configurado por STORAGE_BACKEND."""
+    global _storage
+    if _storage is None:
+        if STORAGE_BACKEND == "s3":
+            _storage = S3Storage(S3_BUCKET, S3_REGION, S3_PUBLIC_URL)
+        else:
+            _storage = LocalStorage(app.config["UPLOAD_FOLDER"])
+    return _storage
+
+@app.template_global()
+def image_url(key):
+    """URL pública de una imagen; las filas antiguas de S3 ya guardan la URL completa."""
+    if key.startswith(("http://", "https://")):
+        return key
+    return get_storage().url(key)
+
+upload_serializer = URLSafeTimedSerializer(app.secret_key, salt="direct-upload")
+
+def create_upload(username, content_type, size, sha256=None):
+    """Reserva una clave para una subida directa y devuelve (token, destino).
+
+    content_type tiene que ser uno de IMAGE_EXTENSIONS. Si el navegador informa el SHA-256 de una imagen que ya está almacenada, no
+    hace falta subirla: el destino es {"method": "none"}.
+    """
+    if sha256 and db.session.query(ImageBlob.sha256).filter_by(sha256=sha256, size=size).first():
+        return upload_serializer.dumps({"h": sha256, "u": username, "s": size}), {"method": "none"}
+    key = f"uploads/{uuid.uuid4().hex}{IMAGE_EXTENSIONS[content_type]}"
+    token = upload_serializer.dumps({"k": key, "u": username, "s": size})
+    return token, get_storage().upload_target(key, content_type, size)
+
+def load_upload(token, username):
+    """Datos de la subida del token si es válido, vigente y de este usuario; si no, None."""
+    try:
+        upload = upload_serializer.loads(token, max_age=UPLOAD_TOKEN_MAX_AGE)
+    except BadSignature:
+        return None
+    if upload.get("u") != username:
+        return None
+    return upload
+
+def save_image(fileobj, digest, content_type):
+    """Guarda la imagen original (de un tipo de IMAGE_EXTENSIONS) bajo una clave derivada de su hash."""
+    started = time.perf_counter()
+    key = f"uploads/{digest}{IMAGE_EXTENSIONS[content_type]}"
+    try:
+        return get_storage().save(fileobj, key, content_type)
+    finally:
+        metrics.observe("save_image_duration_seconds", {"backend": STORAGE_BACKEND}, time.perf_counter() - started)
+
+
+# ---------- DEDUPLICACIÓN DE IMÁGENES ----------
+# Las imágenes se identifican por el SHA-256 de su contenido. Las versiones
+# generadas llevan el hash en el nombre, así que dos publicaciones con la misma
+# foto comparten los mismos archivos; ImageBlob cuenta cuántas la usan y los
+# archivos se borran al liberar la última referencia.
+def hash_stream(stream, out=None):
+    """SHA-256 y tamaño de stream, copiándolo de a bloques a out si se indica."""
+    digest = hashlib.sha256()
+    size = 0
+    while True:
+        block = stream.read(COPY_CHUNK_SIZE)
+        if not block:
+            break
+        digest.update(block)
+        size += len(block)
+        if out is not None:
+            out.write(block)
+    return digest.hexdigest(), size
+
+def spool_upload(file):
+    """Copia el archivo del formulario a un temporal calculando su hash en la misma pasada."""
+    tmp = tempfile.SpooledTemporaryFile(max_size=8 * COPY_CHUNK_SIZE)
+    digest, size = hash_stream(file.stream, tmp)
+    tmp.seek(0)
+    return tmp, digest, size
+
+def acquire_image(digest, size, count=1):
+    """Suma count referencias a la imagen; devuelve True si no existía."""
+    query = ImageBlob.query.filter_by(sha256=digest)
+    values = {ImageBlob.ref_count: ImageBlob.ref_count + count}
+    if query.update(values, synchronize_session=False):
+        return False
+    try:
+        with db.session.begin_nested():
+            db.session.add(ImageBlob(sha256=digest, size=size, ref_count=count))
+    except IntegrityError:
+        # Otra transacción la registró entre medio
+        query.update(values, synchronize_session=False)
+        return False
+    return True
+
+def release_image(digest):
+    """Resta una referencia; devuelve True si era la última (hay que borrar los archivos)."""
+    query = ImageBlob.query.filter_by(sha256=digest)
+    query.update({ImageBlob.ref_count: ImageBlob.ref_count - 1}, synchronize_session=False)
+    remaining = db.session.query(ImageBlob.ref_count).filter_by(sha256=digest).scalar()
+    if remaining is not None and remaining > 0:
+        return False
+    query.delete(synchronize_session=False)
+    return True
+
+def delete_stored_images(keys):
+    """Tarea del pool: borra del almacenamiento los archivos de imágenes que ya nadie usa."""
+    try:
+        get_storage().delete_many(keys)
+    except Exception:
+        # Lo que quede lo recupera `flask sweep-orphans`
+        app.logger.exception("No se pudieron borrar las imágenes %s", sorted(keys))
+
+def image_keys(image_path, renditions):
+    """Todas las claves de almacenamiento de una imagen: la principal y sus versiones."""
+    keys = {image_path} if image_path else set()
+    for fmt in ("webp", "jpeg"):
+        keys.update((renditions or {}).get(fmt, {}).values())
+    if renditions and renditions.get("thumb"):
+        keys.add(renditions["thumb"])
+    return keys
+
+def shared_image(digest, exclude_post_id, processed=False):
+    """(image_path, image_renditions) de otra publicación con la misma imagen, o None."""
+    query = db.session.query(Post.image_path, Post.image_renditions).filter(
+        Post.image_hash == digest, Post.id != exclude_post_id, Post.image_path.isnot(None)
+    )
+    if processed:
+        query = query.filter(Post.image_renditions.isnot(None))
+    shared = query.first()
+    if shared is None:
+        # La foto puede seguir en uso solo por reportes archivados
+        shared = db.session.query(ArchivedPost.image_path, ArchivedPost.image_renditions).filter(
+            ArchivedPost.image_hash == digest, ArchivedPost.image_renditions.isnot(None)
+        ).first()
+    return shared
+
+def attach_image(post, digest, size, spooled=None, content_type=None):
+    """Asocia la imagen digest a post (ya con id) dentro de la transacción actual.
+
+    Si otra publicación ya la tiene, reutiliza sus archivos sin escribir nada.
+    Si no, guarda spooled; sin spooled lanza FileNotFoundError. Devuelve True
+    si hay que procesarla: es nueva, o la compartida todavía es el original
+    (su worker puede borrarlo antes de que esta publicación se confirme).
+    """
+    post.image_hash = digest
+    acquire_image(digest, size)
+    shared = shared_image(digest, post.id)
+    if shared is not None:
+        post.image_path, post.image_renditions = shared
+        return post.image_renditions is None
+    if spooled is None:
+        raise FileNotFoundError(digest)
+    post.image_path = save_image(spooled, digest, content_type)
+    return True
+
+
+# ---------- PROCESAMIENTO DE IMÁGENES ----------
+# Las fotos se procesan en segundo plano: se corrige la orientación, se descarta
+# el EXIF (incluye la ubicación GPS) y se generan versiones WebP/JPEG a anchos
+# fijos para servir con srcset en lugar del original de varios MB.
+IMAGE_WIDTHS = (320, 640, 1280)
+THUMBNAIL_SIZE = (160, 160)
+# Límites contra imágenes gigantes muy comprimidas: tamaño declarado máximo y
+# píxeles que se llegan a decodificar (los JPEG se reducen antes con draft). Con
+# 6 M de píxeles cada imagen en proceso usa hasta ~120 MB; hay que multiplicarlo
+# por IMAGE_WORKERS al dimensionar la memoria del contenedor
+IMAGE_MAX_PIXELS = int(os.getenv("IMAGE_MAX_PIXELS", 100_000_000))
+IMAGE_MAX_DECODED_PIXELS = int(os.getenv("IMAGE_MAX_DECODED_PIXELS", 6_000_000))
+image_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("IMAGE_WORKERS", 2)), thread_name_prefix="image-worker"
+)
+
+def build_renditions(src, stem):
+    """Genera las versiones de la imagen src con nombres stem_<ancho> y devuelve el dict de claves."""
+    from PIL import Image, ImageOps
+
+    storage = get_storage()
+    renditions = {"webp": {}, "jpeg": {}}
+
+    def store(image, filename, fmt, **options):
+        buf = io.BytesIO()
+        # Al no pasar exif= Pillow no copia los metadatos originales
+        image.save(buf, fmt, **options)
+        buf.seek(0)
+        key = storage.save(buf, f"uploads/{filename}", f"image/{fmt.lower()}")
+        # Con workers gevent el pool corre en greenlets: ceder entre versiones para
+        # no frenar las peticiones del worker durante todo el procesamiento
+        time.sleep(0)
+        return key
+
+    # Pillow solo advierte hasta el doble de este valor: se controla también abajo
+    Image.MAX_IMAGE_PIXELS = IMAGE_MAX_PIXELS
+    with Image.open(src) as img:
+        if img.width * img.height > IMAGE_MAX_PIXELS:
+            raise Image.DecompressionBombError(f"{img.width}x{img.height} supera IMAGE_MAX_PIXELS")
+        # Para JPEG, decodificar directamente a una escala reducida ahorra CPU y memoria
+        img.draft("RGB", (max(IMAGE_WIDTHS), max(IMAGE_WIDTHS)))
+        # draft no reduce PNG, WebP ni GIF: se decodificarían a tamaño completo
+        if img.width * img.height > IMAGE_MAX_DECODED_PIXELS:
+            raise Image.DecompressionBombError(f"{img.width}x{img.height} supera IMAGE_MAX_DECODED_PIXELS")
+        ImageOps.exif_transpose(img, in_place=True)
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        for width in IMAGE_WIDTHS:
+            if width < img.width:
+                height = round(img.height * width / img.width)
+                resized = img.resize((width, height), Image.LANCZOS)
+            else:
+                resized = img
+            for fmt, ext, options in (
+                ("webp", "webp", {"quality": 80, "method": 4}),
+                ("jpeg", "jpg", {"quality": 82, "optimize": True, "progressive": True}),
+            ):
+                renditions[fmt][resized.width] = store(
+                    resized, f"{stem}_{resized.width}.{ext}", fmt.upper(), **options
+                )
+            if width >= img.width:
+                break
+        thumb = ImageOps.fit(img, THUMBNAIL_SIZE, Image.LANCZOS)
+        renditions["thumb"] = store(thumb, f"{stem}_thumb.webp", "WEBP", quality=75)
+    return renditions
+
+def process_post_image(post_id, image_path):
+    """Tarea del pool: genera las versiones, las registra en el Post y borra el original con EXIF.
+
+    Las subidas directas llegan sin hash: se calcula acá y, si la imagen ya
+    existía, la publicación pasa a usar los archivos existentes. Lo mismo si
+    otra publicación con la misma foto terminó de procesarla mientras tanto.
+    """
+    from PIL import Image, UnidentifiedImageError
+
+    with app.app_context():
+        image_hash = db.session.query(Post.image_hash).filter_by(id=post_id).scalar()
+        size = None
+        shared = shared_image(image_hash, post_id, processed=True) if image_hash else None
+        try:
+            if shared is None:
+                with get_storage().open(image_path) as src:
+                    if image_hash is None:
+                        image_hash, size = hash_stream(src)
+                        src.seek(0)
+                        shared = None if acquire_image(image_hash, size) else shared_image(image_hash, post_id, processed=True)
+                    if shared is None:
+                        renditions = build_renditions(src, image_hash)
+        except FileNotFoundError:
+            # El worker de otra publicación con la misma foto ya borró el original:
+            # se usan las versiones que confirmó antes de borrarlo
+            db.session.rollback()
+            shared = shared_image(image_hash, post_id, processed=True) if image_hash else None
+            if shared is None:
+                app.logger.exception("No se pudo procesar la imagen %s", image_path)
+                return
+        except (UnidentifiedImageError, Image.DecompressionBombError):
+            # No es una imagen (o no se puede abrir): no se sirve el original
+            db.session.rollback()
+            app.logger.warning("El archivo %s no es una imagen válida; se descarta", image_path)
+            discard_image(image_path)
+            return
+        except Exception:
+            db.session.rollback()
+            app.logger.exception("No se pudo procesar la imagen %s", image_path)
+            return
+        if shared is not None:
+            new_path, renditions = shared
+        else:
+            new_path = renditions["jpeg"][max(renditions["jpeg"])]
+        # También las publicaciones que reutilizaron el original mientras se procesaba.
+        # Las que llegaron con el mismo token de subida no tienen hash ni referencia
+        others = db.session.query(Post.id, Post.image_hash).filter(
+            Post.image_path == image_path, Post.id != post_id
+        ).all()
+        post_ids = {post_id} | {pid for pid, _ in others}
+        unreferenced = sum(1 for _, digest in others if digest is None)
+        if unreferenced:
+            acquire_image(image_hash, size, unreferenced)
+        Post.query.filter(Post.id.in_(post_ids)).update(
+            {
+                Post.image_renditions: renditions,
+                Post.image_path: new_path,
+                Post.image_hash: image_hash,
+            },
+            synchronize_session=False,
         )
-        # URL pública de la imagen en S3
-        return f"https://{S3_BUCKET}.s3.{S3_REGION}.amazonaws.com/{unique_filename}"
+        touched = {pid: touch_post(pid) for pid in post_ids}
+        db.session.commit()
+        for pid, filters in touched.items():
+            invalidate_post_cache(pid, filters)
+            publish_event("update", pid, filters)
+        get_storage().delete(image_path)
+
+def discard_image(image_path):
+    """Quita image_path de las publicaciones que lo usan y lo borra del almacenamiento."""
+    posts = db.session.query(Post.id, Post.image_hash).filter(Post.image_path == image_path).all()
+    for _, image_hash in posts:
+        if image_hash is not None:
+            release_image(image_hash)
+    Post.query.filter(Post.image_path == image_path).update(
+        {Post.image_path: None, Post.image_renditions: None, Post.image_hash: None},
+        synchronize_session=False,
+    )
+    touched = {pid: touch_post(pid) for pid, _ in posts}
+    db.session.commit()
+    for pid, filters in touched.items():
+        invalidate_post_cache(pid, filters)
+        publish_event("update", pid, filters)
+    get_storage().delete(image_path)
+
+def enqueue_image_processing(post_id, image_path):
+    image_executor.submit(process_post_image, post_id, image_path)
+
+def enqueue_image_deletion(keys):
+    if keys:
+        image_executor.submit(delete_stored_images, keys)
 
 
 # Clasificaciones de riesgos: (nombre, descripcion, peso)
@@ -143,22 +1094,939 @@ RISK_KEYWORDS = {
     ],
 }
 
+# ---------- MOTOR DE PUNTAJE ----------
+# Se compila una sola vez al iniciar: por cada tipo de riesgo, una expresión
+# regular con todas sus palabras clave ya normalizadas (sin tildes ni
+# mayúsculas), de modo que el texto se recorre una sola vez.
+def normalizar_texto(texto):
+    """Pasa a minúsculas y quita tildes/diéresis para comparar palabras clave."""
+    descompuesto = unicodedata.normalize("NFKD", texto.casefold())
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
+
+def compilar_motor_score():
+    motor = {}
+    for tipo, _, peso in RISK_TYPES:
+        puntos = {normalizar_texto(k): p for k, p in RISK_KEYWORDS.get(tipo, [])}
+        patron = None
+        if puntos:
+            # Las palabras más largas primero para que ganen sobre sus prefijos
+            alternativas = sorted(puntos, key=len, reverse=True)
+            patron = re.compile("|".join(re.escape(k) for k in alternativas))
+        motor[tipo] = (peso, patron, puntos)
+    return motor
+
+MOTOR_SCORE = compilar_motor_score()
+
 def calcular_score(risk_type, descripcion_texto):
     # Buscar peso base
-    peso = next((p for (t, _, p) in RISK_TYPES if t == risk_type), 2)
+    peso, patron, puntos = MOTOR_SCORE.get(risk_type, (2, None, {}))
     score = peso
     # Sumar puntos por palabras clave encontradas
-    palabras = descripcion_texto.lower().split()
-    keywords = RISK_KEYWORDS.get(risk_type, [])
-    for palabra, puntos in keywords:
-        for w in palabras:
-            if palabra in w:
-                score += puntos
+    if patron is not None:
+        score += sum(puntos[k] for k in patron.findall(normalizar_texto(descripcion_texto or "")))
     # Limitar score entre 0 y 5
     score = max(0, min(5, int(round(score))))
     return score
 
 
+# ---------- BÚSQUEDA ----------
+# Índice de texto completo sobre el título del reporte y sus comentarios: una
+# fila por publicación en post_search. En MySQL es una tabla con índice
+# FULLTEXT (la colación utf8mb4_0900_ai_ci ignora tildes y mayúsculas); en
+# SQLite, una tabla virtual FTS5 con el tokenizador unicode61 sin diacríticos.
+# Se mantiene al día en la misma transacción que los cambios.
+SEARCH_PAGE_SIZE = 20
+
+SEARCH_DDL = {
+    "mysql": (
+        "CREATE TABLE IF NOT EXISTS post_search ("
+        "post_id INTEGER NOT NULL PRIMARY KEY, "
+        "title VARCHAR(200), "
+        "comments MEDIUMTEXT, "
+        "FULLTEXT KEY ft_post_search (title, comments)"
+        ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci"
+    ),
+    "sqlite": (
+        "CREATE VIRTUAL TABLE IF NOT EXISTS post_search "
+        "USING fts5(title, comments, tokenize = 'unicode61 remove_diacritics 2')"
+    ),
+}
+
+# db.create_all()/drop_all() también crean y borran el índice (no es un modelo)
+for _dialect, _ddl in SEARCH_DDL.items():
+    event.listen(db.metadata, "after_create", DDL(_ddl).execute_if(dialect=_dialect))
+    event.listen(db.metadata, "after_drop", DDL("DROP TABLE IF EXISTS post_search").execute_if(dialect=_dialect))
+
+def search_dialect():
+    """Nombre del dialecto si tiene índice de texto completo, o None (búsqueda con LIKE)."""
+    name = db.engine.dialect.name
+    return name if name in SEARCH_DDL else None
+
+def _search_doc_key():
+    # En FTS5 la clave del documento es el rowid
+    return "rowid" if search_dialect() == "sqlite" else "post_id"
+
+def index_posts_for_search(post_ids):
+    """(Re)escribe los documentos de búsqueda de post_ids con su título y todos sus comentarios."""
+    if not search_dialect() or not post_ids:
+        return
+    titles = dict(db.session.query(Post.id, Post.title).filter(Post.id.in_(post_ids)))
+    comments = {post_id: [] for post_id in titles}
+    rows = (
+        db.session.query(Comment.post_id, Comment.text)
+        .filter(Comment.post_id.in_(list(titles)))
+        .order_by(Comment.id)
+    )
+    for post_id, comment_text in rows:
+        comments[post_id].append(comment_text or "")
+    key = _search_doc_key()
+    remove_posts_from_search(post_ids)
+    docs = [
+        {"post_id": post_id, "title": title or "", "comments": " ".join(comments[post_id])}
+        for post_id, title in titles.items()
+    ]
+    if docs:
+        db.session.execute(
+            text(f"INSERT INTO post_search ({key}, title, comments) VALUES (:post_id, :title, :comments)"),
+            docs,
+        )
+
+def add_post_to_search(post_id, title):
+    """Documento de una publicación recién creada (todavía sin comentarios)."""
+    if not search_dialect():
+        return
+    db.session.execute(
+        text(f"INSERT INTO post_search ({_search_doc_key()}, title, comments) VALUES (:post_id, :title, '')"),
+        {"post_id": post_id, "title": title or ""},
+    )
+
+def append_comment_to_search(post_id, comment_text):
+    """Agrega un comentario nuevo al documento del post sin releer los anteriores."""
+    if not search_dialect():
+        return
+    concat = "comments || ' ' || :text" if search_dialect() == "sqlite" else "CONCAT(comments, ' ', :text)"
+    db.session.execute(
+        text(f"UPDATE post_search SET comments = {concat} WHERE {_search_doc_key()} = :post_id"),
+        {"post_id": post_id, "text": comment_text},
+    )
+
+def remove_posts_from_search(post_ids):
+    if not search_dialect() or not post_ids:
+        return
+    db.session.execute(
+        text(f"DELETE FROM post_search WHERE {_search_doc_key()} IN :ids").bindparams(
+            bindparam("ids", expanding=True)
+        ),
+        {"ids": list(post_ids)},
+    )
+
+def _fts5_query(query):
+    """Convierte el texto del usuario en una consulta FTS5 segura: cada palabra como prefijo, unidas con OR."""
+    words = re.findall(r"\w+", normalizar_texto(query))
+    return " OR ".join(f'"{w}"*' for w in words)
+
+def search_posts(query, risk_filter="todos", solucion_filter="no", page=1, page_size=SEARCH_PAGE_SIZE):
+    """Ids de publicaciones que coinciden con query, de mayor a menor relevancia.
+
+    Devuelve (ids, hay_mas). Pide una fila de más para saber si hay otra página.
+    """
+    dialect = search_dialect()
+    filters = ["post.solucionado = :solucionado"]
+    params = {
+        "solucionado": solucion_filter == "si",
+        "limit": page_size + 1,
+        "offset": (page - 1) * page_size,
+    }
+    if risk_filter and risk_filter != "todos":
+        filters.append("post.descripcion = :risk_type")
+        params["risk_type"] = risk_filter
+    where = " AND ".join(filters)
+    if dialect == "sqlite":
+        params["q"] = _fts5_query(query)
+        if not params["q"]:
+            return [], False
+        sql = (
+            "SELECT post.id FROM post_search JOIN post ON post.id = post_search.rowid "
+            f"WHERE post_search MATCH :q AND {where} "
+            "ORDER BY bm25(post_search), post.id DESC LIMIT :limit OFFSET :offset"
+        )
+    elif dialect == "mysql":
+        params["q"] = query
+        match = "MATCH(post_search.title, post_search.comments) AGAINST (:q IN NATURAL LANGUAGE MODE)"
+        sql = (
+            f"SELECT post.id FROM post_search JOIN post ON post.id = post_search.post_id "
+            f"WHERE {match} AND {where} "
+            f"ORDER BY {match} DESC, post.id DESC LIMIT :limit OFFSET :offset"
+        )
+    else:
+        # Sin índice de texto completo: búsqueda simple por título
+        params["q"] = f"%{query}%"
+        sql = (
+            f"SELECT post.id FROM post WHERE post.title LIKE :q AND {where} "
+            "ORDER BY post.id DESC LIMIT :limit OFFSET :offset"
+        )
+    ids = [row[0] for row in db.session.execute(text(sql), params)]
+    return ids[:page_size], len(ids) > page_size
+
+
+# ---------- PAGINACIÓN DEL FEED ----------
+# El feed se ordena por (score, likes, id) descendente y se pagina por cursor
+# (keyset): cada página pide "los siguientes después de la última tupla vista",
+# así el costo no depende de cuántas publicaciones haya antes.
+def encode_cursor(score, likes, post_id):
+    raw = f"{score}:{likes}:{post_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor):
+    """Devuelve la tupla (score, likes, id) del cursor, o None si es inválido."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        score, likes, post_id = base64.urlsafe_b64decode(padded).decode().split(":")
+        return int(score), int(likes), int(post_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+def _feed_query(model, risk_filter, solucionado, after, limit):
+    query = model.query.options(selectinload(model.comments))
+    if risk_filter and risk_filter != "todos":
+        query = query.filter(model.descripcion == risk_filter)
+    query = query.filter(model.solucionado == solucionado)
+    if after:
+        query = query.filter(tuple_(model.score, model.like_count, model.id) < tuple_(*after))
+    return query.order_by(model.score.desc(), model.like_count.desc(), model.id.desc()).limit(limit).all()
+
+def feed_page(risk_filter, solucion_filter, after=None, page_size=None):
+    """Devuelve (posts, next_cursor) para una página del feed ordenada en SQL.
+
+    Los comentarios de la página se cargan en una sola consulta extra
+    (selectinload) en lugar de una por publicación.
+    """
+    page_size = page_size or app.config["FEED_PAGE_SIZE"]
+    solucionado = solucion_filter == "si"
+    posts = _feed_query(Post, risk_filter, solucionado, after, page_size + 1)
+    if solucionado:
+        # Los solucionados pueden estar en la tabla activa o en el archivo: se
+        # pide una página de cada una y se mezclan con el mismo orden
+        archived = _feed_query(ArchivedPost, risk_filter, solucionado, after, page_size + 1)
+        if archived:
+            posts = sorted(posts + archived, key=lambda p: (p.score, p.like_count, p.id), reverse=True)
+    # Se pide una fila de más para saber si existe una página siguiente
+    next_cursor = None
+    if len(posts) > page_size:
+        posts = posts[:page_size]
+        last = posts[-1]
+        next_cursor = encode_cursor(last.score, last.like_count, last.id)
+    return posts, next_cursor
+
+def liked_post_ids(username, post_ids):
+    """Conjunto de ids (entre post_ids) a los que el usuario dio like, en una sola consulta."""
+    if not username or not post_ids:
+        return set()
+    rows = db.session.query(Like.post_id).filter(
+        Like.username == username, Like.post_id.in_(post_ids)
+    )
+    return {post_id for (post_id,) in rows}
+
+
+# ---------- CACHÉ DEL FEED ----------
+# Se cachean los ids ordenados de cada página, por (tipo de riesgo, solucionado,
+# cursor), y el HTML del cuerpo de cada tarjeta. Lo que depende del usuario
+# (like propio, botones de borrar) se renderiza en cada petición.
+# Las claves de páginas y tarjetas llevan la FeedVersion del filtro, que sube
+# en la misma transacción que cualquier cambio: así tampoco sirve datos viejos
+# un worker distinto del que hizo el cambio. Las páginas además se invalidan
+# subiendo un contador de generación por filtro.
+class LRUCacheBackend:
+    """Caché en memoria del proceso con tamaño máximo y expiración.
+
+    Cada worker tiene la suya, por eso las entradas expiran tras FEED_CACHE_TTL
+    aunque otro worker haya modificado los datos.
+    """
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        # Los contadores de generación no se desalojan: si se perdieran podrían
+        # volver a valer páginas viejas
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def counter(self, key):
+        return self._counters.get(key, 0)
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+
+
+class RedisCacheBackend:
+    """Caché compartida entre workers en Redis (o un servidor compatible)."""
+
+    def __init__(self, url, ttl):
+        import redis  # Dependencia opcional, solo si se configura FEED_CACHE_URL
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+
+    def get(self, key):
+        raw = self.client.get(key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value):
+        self.client.set(key, json.dumps(value), ex=self.ttl)
+
+    def delete(self, *keys):
+        if keys:
+            self.client.delete(*keys)
+
+    def counter(self, key):
+        return int(self.client.get(key) or 0)
+
+    def incr(self, key):
+        self.client.incr(key)
+
+
+class FeedCache:
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key):
+        value = self.backend.get(key)
+        self._count(value is not None)
+        return value
+
+    def set(self, key, value):
+        self.backend.set(key, value)
+
+    def page_key(self, risk_filter, solucion_filter, after, version=0):
+        """Clave de una página; version (FeedVersion) la invalida también desde otros workers."""
+        solucion_filter = "si" if solucion_filter == "si" else "no"
+        generation = self.backend.counter(f"feed:gen:{risk_filter}:{solucion_filter}")
+        return f"feed:page:{risk_filter}:{solucion_filter}:{generation}:{version}:{after or ''}"
+
+    @staticmethod
+    def card_key(post_id, is_admin, scope):
+        """Clave de una tarjeta; scope es (tipo de riesgo, solucionado, versión) del filtro mostrado."""
+        risk_filter, solucion_filter, version = scope
+        solucion_filter = "si" if solucion_filter == "si" else "no"
+        return f"feed:card:{risk_filter}:{solucion_filter}:{version}:{post_id}:{int(bool(is_admin))}"
+
+    def invalidate_post(self, post_id, risk_type=None, solucionado=None, reorder=False):
+        """Si cambió la posición del post en el feed, invalida las páginas de sus filtros.
+
+        Su tarjeta no hace falta borrarla: el cambio subió la versión de esos filtros.
+        """
+        if reorder:
+            self.invalidate_pages(risk_type, solucionado)
+
+    def invalidate_pages(self, risk_type, solucionado):
+        estado = "si" if solucionado else "no"
+        for risk_filter in {risk_type, "todos"}:
+            self.backend.incr(f"feed:gen:{risk_filter}:{estado}")
+
+    def invalidate_all(self):
+        """Invalida las páginas de todos los filtros (p. ej. tras recalcular puntajes en lote)."""
+        for risk_type, _, _ in RISK_TYPES:
+            for solucionado in (False, True):
+                self.invalidate_pages(risk_type, solucionado)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+if app.config["FEED_CACHE_URL"]:
+    feed_cache = FeedCache(RedisCacheBackend(app.config["FEED_CACHE_URL"], app.config["FEED_CACHE_TTL"]))
+else:
+    feed_cache = FeedCache(LRUCacheBackend(app.config["FEED_CACHE_SIZE"], app.config["FEED_CACHE_TTL"]))
+
+def build_card(post, is_admin):
+    """Entrada cacheable de una publicación: HTML del cuerpo y datos para las partes por usuario."""
+    return {
+        "id": post.id,
+        "username": post.username,
+        "solucionado": bool(post.solucionado),
+        "archived": post.archived,
+        "like_count": post.like_count,
+        "html": render_template("post_card.html", post=post, is_admin=is_admin),
+        "comments": [
+            {"id": c.id, "username": c.username, "text": c.text} for c in post.comments
+        ],
+    }
+
+def feed_cards(posts, post_ids, is_admin, scope=None):
+    """Devuelve las tarjetas de post_ids en orden, renderizando solo las que no están en caché.
+
+    posts son los Post ya cargados (si la página no venía de la caché). scope es
+    (tipo de riesgo, solucionado, versión) del filtro al que pertenecen todas;
+    sin scope no se usa la caché.
+    """
+    loaded = {post.id: post for post in posts}
+    cards = {}
+    missing = []
+
+    def store(post):
+        cards[post.id] = build_card(post, is_admin)
+        if scope is not None:
+            feed_cache.set(feed_cache.card_key(post.id, is_admin, scope), cards[post.id])
+
+    for post_id in post_ids:
+        card = feed_cache.get(feed_cache.card_key(post_id, is_admin, scope)) if scope is not None else None
+        if card is not None:
+            cards[post_id] = card
+        elif post_id in loaded:
+            store(loaded[post_id])
+        else:
+            missing.append(post_id)
+    for model in (Post, ArchivedPost):
+        if not missing:
+            break
+        for post in model.query.options(selectinload(model.comments)).filter(model.id.in_(missing)):
+            store(post)
+        missing = [post_id for post_id in missing if post_id not in cards]
+    # Una publicación borrada entre medio simplemente no aparece
+    return [cards[post_id] for post_id in post_ids if post_id in cards]
+
+def invalidate_post_cache(post_id, filters, reorder=False):
+    """Invalida la caché de un post a partir de los filtros que devolvió touch_post()."""
+    if filters is not None:
+        feed_cache.invalidate_post(post_id, filters.descripcion, filters.solucionado, reorder=reorder)
+
+
+# ---------- EVENTOS EN VIVO ----------
+# Las rutas publican eventos pequeños (like, comentario, reporte nuevo, puntaje,
+# solucionado) después del commit y /stream los reenvía a los navegadores por
+# Server-Sent Events. Solo usa queue/threading, que gevent parchea, así que con
+# GUNICORN_WORKER_CLASS=gevent cada conexión abierta es una greenlet y no un hilo.
+class LocalBroker:
+    """Pub/sub en memoria del proceso: una cola acotada por cliente conectado."""
+
+    def __init__(self, max_queue=100):
+        self.max_queue = max_queue
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        q = queue.Queue(maxsize=self.max_queue)
+        with self._lock:
+            self._subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._subscribers.discard(q)
+
+    def publish(self, event):
+        self.deliver(event)
+
+    def deliver(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait(event)
+            except queue.Full:
+                # Un cliente que no lee no debe frenar a los demás; al reconectar recarga
+                pass
+
+
+class RedisBroker(LocalBroker):
+    """Reparte los eventos entre procesos con Redis pub/sub.
+
+    Cada proceso mantiene una sola suscripción a Redis (un hilo) y la reparte a
+    sus clientes locales, en lugar de abrir una conexión a Redis por navegador.
+    """
+
+    channel = "blog:events"
+
+    def __init__(self, url, max_queue=100):
+        import redis  # Dependencia opcional, solo si se configura EVENTS_URL
+
+        super().__init__(max_queue)
+        self.client = redis.Redis.from_url(url)
+        self._listener = None
+
+    def subscribe(self):
+        if self._listener is None:
+            with self._lock:
+                if self._listener is None:
+                    self._listener = threading.Thread(target=self._listen, name="events-listener", daemon=True)
+                    self._listener.start()
+        return super().subscribe()
+
+    def publish(self, event):
+        self.client.publish(self.channel, json.dumps(event))
+
+    def _listen(self):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.channel)
+        for message in pubsub.listen():
+            self.deliver(json.loads(message["data"]))
+
+
+if app.config["EVENTS_URL"]:
+    broker = RedisBroker(app.config["EVENTS_URL"])
+else:
+    broker = LocalBroker()
+
+def publish_event(event_type, post_id, filters=None, **data):
+    """Publica un evento del post; filters (descripcion, solucionado) permite filtrarlo en el cliente."""
+    event = {"type": event_type, "post_id": post_id, **data}
+    if filters is not None:
+        event["risk_type"] = filters[0]
+        event["solucionado"] = bool(filters[1])
+    try:
+        broker.publish(event)
+    except Exception:
+        # Las actualizaciones en vivo son un extra: nunca deben hacer fallar la petición
+        app.logger.exception("No se pudo publicar el evento %s", event_type)
+
+
+# ---------- GET CONDICIONAL ----------
+UPLOADS_MAX_AGE = 365 * 24 * 3600
+
+def feed_version(risk_filter, solucion_filter):
+    """(versión, fecha del último cambio) del filtro, según FeedVersion."""
+    row = (
+        db.session.query(FeedVersion.version, FeedVersion.updated_at)
+        .filter_by(risk_type=risk_filter, solucionado=(solucion_filter == "si"))
+        .first()
+    )
+    return (row.version, row.updated_at) if row else (0, None)
+
+def feed_etag(version, *request_parts):
+    """ETag débil: versión del filtro más todo lo que cambia el HTML para este usuario."""
+    digest = hashlib.sha1("|".join(str(p) for p in request_parts).encode()).hexdigest()[:16]
+    return f"{version}-{digest}"
+
+def set_feed_validators(response, etag, updated_at):
+    response.set_etag(etag, weak=True)
+    if updated_at is not None:
+        response.last_modified = updated_at.replace(tzinfo=timezone.utc)
+    # El HTML depende de la sesión: solo el navegador puede guardarlo y debe revalidar siempre
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.vary.add("Cookie")
+
+@app.after_request
+def cache_uploaded_images(response):
+    # Las imágenes subidas tienen nombres únicos (uuid4) y nunca cambian de contenido
+    if (
+        request.endpoint == "static"
+        and (request.view_args or {}).get("filename", "").startswith("uploads/")
+        and response.status_code in (200, 304)
+    ):
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = UPLOADS_MAX_AGE
+        response.cache_control.immutable = True
+    return response
+
+
+# ---------- ESTADÍSTICAS ----------
+# Semana asignada a las publicaciones sin fecha de creación (filas antiguas)
+WEEK_UNKNOWN = date(1970, 1, 5)
+DASHBOARD_WEEKS = int(os.getenv("DASHBOARD_WEEKS", 12))
+
+def week_start(created_at):
+    """Lunes de la semana de created_at."""
+    if created_at is None:
+        return WEEK_UNKNOWN
+    day = created_at.date()
+    return day - timedelta(days=day.weekday())
+
+def bump_risk_stat(risk_type, solucionado, created_at, posts=0, score=0):
+    """Suma posts y score a la fila del resumen dentro de la transacción actual."""
+    key = {"risk_type": risk_type, "solucionado": bool(solucionado), "week": week_start(created_at)}
+    query = RiskStat.query.filter_by(**key)
+    values = {RiskStat.post_count: RiskStat.post_count + posts, RiskStat.score_sum: RiskStat.score_sum + score}
+    if query.update(values, synchronize_session=False):
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.add(RiskStat(post_count=posts, score_sum=score, **key))
+    except IntegrityError:
+        # Otra transacción creó la fila entre medio
+        query.update(values, synchronize_session=False)
+
+def rebuild_risk_stats(batch_size=1000):
+    """Recalcula el resumen completo desde Post (no hace commit)."""
+    totals = {}
+    for model in (Post, ArchivedPost):
+        rows = (
+            db.session.query(model.descripcion, model.solucionado, model.created_at, model.score)
+            .execution_options(yield_per=batch_size)
+        )
+        for risk_type, solucionado, created_at, score in rows:
+            key = (risk_type, bool(solucionado), week_start(created_at))
+            count, score_sum = totals.get(key, (0, 0))
+            totals[key] = (count + 1, score_sum + (score or 0))
+    RiskStat.query.delete(synchronize_session=False)
+    if totals:
+        db.session.execute(insert(RiskStat), [
+            {"risk_type": r, "solucionado": s, "week": w, "post_count": c, "score_sum": t}
+            for (r, s, w), (c, t) in totals.items()
+        ])
+    return len(totals)
+
+def dashboard_summary(weeks=DASHBOARD_WEEKS):
+    """Totales por tipo de riesgo y tendencia semanal, leídos solo del resumen."""
+    by_risk = {}
+    rows = db.session.query(
+        RiskStat.risk_type, RiskStat.solucionado, func.sum(RiskStat.post_count), func.sum(RiskStat.score_sum)
+    ).group_by(RiskStat.risk_type, RiskStat.solucionado)
+    for risk_type, solucionado, count, score_sum in rows:
+        entry = by_risk.setdefault(risk_type, {"risk_type": risk_type, "open": 0, "solved": 0, "score_sum": 0})
+        entry["solved" if solucionado else "open"] += int(count or 0)
+        entry["score_sum"] += int(score_sum or 0)
+    for entry in by_risk.values():
+        total = entry["open"] + entry["solved"]
+        entry["total"] = total
+        entry["avg_score"] = round(entry["score_sum"] / total, 2) if total else None
+    first_week = week_start(datetime.utcnow()) - timedelta(weeks=weeks - 1)
+    trend = {first_week + timedelta(weeks=i): {"open": 0, "solved": 0, "score_sum": 0} for i in range(weeks)}
+    rows = (
+        db.session.query(
+            RiskStat.week, RiskStat.solucionado, func.sum(RiskStat.post_count), func.sum(RiskStat.score_sum)
+        )
+        .filter(RiskStat.week >= first_week)
+        .group_by(RiskStat.week, RiskStat.solucionado)
+    )
+    for week, solucionado, count, score_sum in rows:
+        if week not in trend:
+            continue
+        trend[week]["solved" if solucionado else "open"] += int(count or 0)
+        trend[week]["score_sum"] += int(score_sum or 0)
+    weekly = []
+    for week, entry in sorted(trend.items()):
+        total = entry["open"] + entry["solved"]
+        weekly.append({
+            "week": week, "open": entry["open"], "solved": entry["solved"], "total": total,
+            "avg_score": round(entry["score_sum"] / total, 2) if total else None,
+        })
+    return sorted(by_risk.values(), key=lambda e: -e["total"]), weekly
+
+# ---------- ARCHIVO DE SOLUCIONADOS ----------
+# Los reportes solucionados hace más de ARCHIVE_AFTER_DAYS pasan, con sus likes
+# y comentarios, a las tablas archived_*; el feed de solucionados lee de ambas.
+# Cada lote se mueve en una transacción con las publicaciones bloqueadas
+# (FOR UPDATE), así un like o comentario concurrente espera o falla, pero no se pierde.
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", 180))
+
+def _move_rows(source, target, column, ids, **extra):
+    """Copia a target las filas de source con column IN ids (INSERT ... SELECT) y las borra de source."""
+    names = [c.name for c in source.__table__.columns if c.name in target.__table__.columns]
+    values = [source.__table__.c[name] for name in names]
+    values += [literal(value, target.__table__.c[name].type) for name, value in extra.items()]
+    db.session.execute(
+        insert(target).from_select(names + list(extra), select(*values).where(column.in_(ids)))
+    )
+    db.session.query(source).filter(column.in_(ids)).delete(synchronize_session=False)
+
+def archive_posts(post_ids):
+    """Mueve al archivo las publicaciones solucionadas de post_ids (sin commit).
+
+    Devuelve [(id, tipo de riesgo)] de las que se movieron.
+    """
+    rows = (
+        db.session.query(Post.id, Post.descripcion)
+        .filter(Post.id.in_(post_ids), Post.solucionado.is_(True))
+        .with_for_update()
+        .all()
+    )
+    ids = [post_id for post_id, _ in rows]
+    if not ids:
+        return []
+    # Primero los hijos, por las claves foráneas hacia post
+    _move_rows(Like, ArchivedLike, Like.post_id, ids)
+    _move_rows(Comment, ArchivedComment, Comment.post_id, ids)
+    _move_rows(Post, ArchivedPost, Post.id, ids, archived_at=datetime.utcnow())
+    remove_posts_from_search(ids)
+    for risk_type in {risk for _, risk in rows}:
+        bump_feed_version(risk_type, True)
+    return rows
+
+def restore_conflicts(post_ids):
+    """Ids de post_ids cuya publicación, like o comentario archivado ya está ocupado en las tablas activas."""
+    conflicts = {pid for (pid,) in db.session.query(Post.id).filter(Post.id.in_(post_ids))}
+    for archived, live in ((ArchivedLike, Like), (ArchivedComment, Comment)):
+        conflicts.update(
+            pid for (pid,) in
+            db.session.query(archived.post_id).join(live, live.id == archived.id)
+            .filter(archived.post_id.in_(post_ids)).distinct()
+        )
+    return conflicts
+
+def restore_posts(post_ids):
+    """Devuelve del archivo a las tablas activas las publicaciones de post_ids (sin commit).
+
+    Devuelve (filas restauradas, ids en conflicto); las que chocan con un id
+    ya usado en las tablas activas se dejan en el archivo.
+    """
+    rows = (
+        db.session.query(ArchivedPost.id, ArchivedPost.descripcion)
+        .filter(ArchivedPost.id.in_(post_ids))
+        .with_for_update()
+        .all()
+    )
+    conflicts = restore_conflicts([post_id for post_id, _ in rows]) if rows else set()
+    rows = [row for row in rows if row[0] not in conflicts]
+    ids = [post_id for post_id, _ in rows]
+    if not ids:
+        return [], sorted(conflicts)
+    _move_rows(ArchivedPost, Post, ArchivedPost.id, ids)
+    _move_rows(ArchivedLike, Like, ArchivedLike.post_id, ids)
+    _move_rows(ArchivedComment, Comment, ArchivedComment.post_id, ids)
+    index_posts_for_search(ids)
+    for risk_type in {risk for _, risk in rows}:
+        bump_feed_version(risk_type, True)
+    return rows, sorted(conflicts)
+
+def invalidate_moved_posts(rows):
+    """Tras archivar o restaurar cambian las páginas; las tarjetas ya las renovó bump_feed_version."""
+    for risk_type in {risk for _, risk in rows}:
+        feed_cache.invalidate_pages(risk_type, True)
+
+# ---------- LIMPIEZA DE HUÉRFANOS ----------
+# `flask sweep-orphans` recupera lo que quedó sin dueño: likes y comentarios de
+# publicaciones que ya no existen (borradas antes de ON DELETE CASCADE), contadores
+# de ImageBlob desfasados y archivos que ninguna publicación usa (borrados que
+# fallaron, subidas directas abandonadas). Todo se recorre por lotes.
+RENDITION_SUFFIX = re.compile(r"_(?:\d+|thumb)$")
+
+def image_stem(key):
+    """Parte común del nombre de una imagen y sus versiones: "uploads/abc_640.webp" -> "abc"."""
+    name = key.rsplit("/", 1)[-1]
+    if name.endswith(".part"):
+        name = name[:-len(".part")]
+    return RENDITION_SUFFIX.sub("", os.path.splitext(name)[0])
+
+def referenced_image_stems(batch_size=1000):
+    """Nombres base de todas las imágenes en uso, activas o archivadas."""
+    stems = set()
+    for model in (Post, ArchivedPost):
+        rows = db.session.query(model.image_path, model.image_renditions, model.image_hash).yield_per(batch_size)
+        for image_path, renditions, image_hash in rows:
+            stems.update(image_stem(key) for key in image_keys(image_path, renditions))
+            if image_hash:
+                stems.add(image_hash)
+    return stems
+
+def sweep_orphan_rows(model, parent, batch_size=1000, dry_run=False):
+    """Borra, por lotes de ids, las filas de model cuyo post_id no existe en parent; devuelve cuántas."""
+    missing = model.post_id.is_(None) | ~select(parent.id).where(parent.id == model.post_id).exists()
+    last_id = 0
+    total = 0
+    while True:
+        ids = [
+            row_id for (row_id,) in
+            db.session.query(model.id).filter(model.id > last_id).order_by(model.id).limit(batch_size)
+        ]
+        if not ids:
+            break
+        orphans = [row_id for (row_id,) in db.session.query(model.id).filter(model.id.in_(ids), missing)]
+        if orphans and not dry_run:
+            db.session.query(model).filter(model.id.in_(orphans)).delete(synchronize_session=False)
+        db.session.commit()
+        total += len(orphans)
+        last_id = ids[-1]
+    return total
+
+def reconcile_image_blobs(batch_size=1000, dry_run=False):
+    """Ajusta ref_count a las publicaciones que usan cada imagen y borra las que no usa ninguna.
+
+    Cada cambio lleva la condición ref_count = valor leído, así no pisa una
+    referencia que otra transacción sumó entre medio. Devuelve (borradas, corregidas).
+    """
+    last = ""
+    removed = fixed = 0
+    while True:
+        rows = (
+            db.session.query(ImageBlob.sha256, ImageBlob.ref_count)
+            .filter(ImageBlob.sha256 > last)
+            .order_by(ImageBlob.sha256)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+        digests = [digest for digest, _ in rows]
+        refs = Counter()
+        for model in (Post, ArchivedPost):
+            refs.update(dict(
+                db.session.query(model.image_hash, func.count(model.id))
+                .filter(model.image_hash.in_(digests))
+                .group_by(model.image_hash)
+            ))
+        for digest, ref_count in rows:
+            if refs[digest] == ref_count:
+                continue
+            query = ImageBlob.query.filter_by(sha256=digest, ref_count=ref_count)
+            if refs[digest] == 0:
+                removed += 1 if dry_run else query.delete(synchronize_session=False)
+            else:
+                fixed += 1 if dry_run else query.update(
+                    {ImageBlob.ref_count: refs[digest]}, synchronize_session=False
+                )
+        db.session.commit()
+        last = digests[-1]
+    return removed, fixed
+
+def sweep_orphan_images(batch_size=1000, grace_seconds=3600, dry_run=False):
+    """Borra los archivos del almacenamiento que no usa ninguna publicación.
+
+    Los más nuevos que grace_seconds se dejan: pueden ser subidas directas cuya
+    publicación todavía no se creó. Devuelve (archivos, bytes).
+    """
+    stems = referenced_image_stems(batch_size)
+    cutoff = time.time() - grace_seconds
+    storage = get_storage()
+    pending = []
+    files = reclaimed = 0
+    for key, size, mtime in storage.iter_objects():
+        if mtime > cutoff or image_stem(key) in stems:
+            continue
+        pending.append(key)
+        files += 1
+        reclaimed += size
+        if len(pending) >= batch_size:
+            if not dry_run:
+                storage.delete_many(pending)
+            pending = []
+    if pending and not dry_run:
+        storage.delete_many(pending)
+    return files, reclaimed
+
+
+# ---------- EXPORTACIÓN / IMPORTACIÓN ----------
+# Columnas del archivo, en orden. like_count/comment_count son informativos: al
+# importar no se recrean los likes ni los comentarios, así que arrancan en 0.
+EXPORT_FIELDS = [
+    "id", "title", "descripcion", "score", "solucionado", "username",
+    "created_at", "image_path", "like_count", "comment_count",
+]
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+def iter_export_rows(batch_size=1000):
+    """Recorre todas las publicaciones (activas y archivadas) con un cursor del servidor (memoria constante)."""
+    for model in (Post, ArchivedPost):
+        columns = [getattr(model, field) for field in EXPORT_FIELDS]
+        rows = db.session.query(*columns).order_by(model.id).execution_options(yield_per=batch_size)
+        for row in rows:
+            record = dict(zip(EXPORT_FIELDS, row))
+            if record["created_at"] is not None:
+                record["created_at"] = record["created_at"].isoformat()
+            record["solucionado"] = bool(record["solucionado"])
+            yield record
+
+def export_chunks(fmt, batch_size=1000):
+    """Genera el archivo de exportación línea por línea en formato csv o ndjson."""
+    if fmt == "ndjson":
+        for record in iter_export_rows(batch_size):
+            yield json.dumps(record, ensure_ascii=False) + "\n"
+        return
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    for record in iter_export_rows(batch_size):
+        record["solucionado"] = "true" if record["solucionado"] else "false"
+        writer.writerow(record)
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    yield buf.getvalue()
+
+def read_import_rows(stream, fmt):
+    """Lee los registros de un archivo csv (diccionarios) o ndjson (líneas sin decodificar).
+
+    Las líneas ndjson las decodifica import_row, así una línea mal formada se
+    informa como fila inválida en lugar de cortar la lectura.
+    """
+    if fmt == "ndjson":
+        for line in stream:
+            if line.strip():
+                yield line
+    else:
+        yield from csv.DictReader(stream)
+
+def _parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value or "").strip().lower() in ("1", "true", "si", "sí", "yes")
+
+def import_row(record):
+    """Convierte un registro importado en los valores de un INSERT de Post (o ValueError)."""
+    if isinstance(record, str):
+        record = json.loads(record)
+    if not isinstance(record, dict):
+        raise ValueError("el registro no es un objeto JSON")
+    risk_type = str(record.get("descripcion") or "").strip()
+    title = (record.get("title") or "")[:200]
+    if not risk_type:
+        raise ValueError("falta el tipo de riesgo (descripcion)")
+    score = record.get("score")
+    if score in (None, ""):
+        score = calcular_score(risk_type, title)
+    else:
+        score = int(score)
+        if not 0 <= score <= 5:
+            raise ValueError(f"puntaje fuera de rango: {score}")
+    created_at = record.get("created_at")
+    if created_at:
+        created_at = datetime.fromisoformat(str(created_at))
+        if created_at.tzinfo is not None:
+            created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return {
+        "title": title,
+        "descripcion": risk_type,
+        "score": score,
+        "solucionado": _parse_bool(record.get("solucionado")),
+        "username": (record.get("username") or "importado")[:50],
+        "created_at": created_at or datetime.utcnow(),
+        "image_path": record.get("image_path") or None,
+        "like_count": 0,
+        "comment_count": 0,
+    }
+
 # ---------- RUTAS ----------
 @app.route("/", methods=["GET", "POST"])
 @login_required
@@ -166,28 +2034,79 @@ def index():
     # Obtener filtro de tipo de riesgo
     solucion_filter = request.args.get("solucionado", "no")
     risk_filter = request.args.get("risk_type", "todos")
-    posts_query = Post.query
-    if risk_filter and risk_filter != "todos":
-        posts_query = posts_query.filter_by(descripcion=risk_filter)
-    if solucion_filter == "si":
-        posts_query = posts_query.filter_by(solucionado=True)
-    else:
-        posts_query = posts_query.filter_by(solucionado=False)
-    posts = posts_query.all()
-    # Ordenar primero por score (desc), luego por cantidad de likes (desc)
-    posts = sorted(posts, key=lambda p: (-p.score, -len(p.likes)))
+    after = request.args.get("after")
+    after = decode_cursor(after) if after else None
     logged_in_user = session.get("username")
     is_admin = session.get("is_admin", False)
+    cursor = encode_cursor(*after) if after else None
+    # Si nada cambió en este filtro desde la última visita, responder 304 sin renderizar
+    version, updated_at = feed_version(risk_filter, solucion_filter)
+    etag = feed_etag(version, risk_filter, solucion_filter, cursor, logged_in_user, is_admin)
+    if request.method == "GET" and not is_resource_modified(
+        request.environ, etag=etag, last_modified=updated_at
+    ):
+        response = Response(status=304)
+        set_feed_validators(response, etag, updated_at)
+        return response
+    # Ordenar primero por score (desc), luego por cantidad de likes (desc), en la base de datos
+    page_key = feed_cache.page_key(risk_filter, solucion_filter, cursor, version)
+    page = feed_cache.get(page_key)
+    posts = []
+    if page is None:
+        posts, next_cursor = feed_page(risk_filter, solucion_filter, after)
+        page = {"ids": [post.id for post in posts], "next_cursor": next_cursor}
+        feed_cache.set(page_key, page)
+    cards = feed_cards(posts, page["ids"], is_admin, (risk_filter, solucion_filter, version))
+    liked_ids = liked_post_ids(logged_in_user, page["ids"])
     # Pasar tipos de riesgo y filtro seleccionado al template
     risk_types = [r[0] for r in RISK_TYPES]
-    return render_template(
+    next_url = None
+    if page["next_cursor"]:
+        next_url = url_for("index", risk_type=risk_filter, solucionado=solucion_filter, after=page["next_cursor"])
+    response = make_response(render_template(
         "index.html",
-        posts=posts,
+        cards=cards,
+        liked_ids=liked_ids,
+        next_url=next_url,
         logged_in_user=logged_in_user,
         is_admin=is_admin,
         risk_types=risk_types,
         risk_filter=risk_filter,
         solucion_filter=solucion_filter
+    ))
+    set_feed_validators(response, etag, updated_at)
+    return response
+
+@app.route("/search")
+@login_required
+def search():
+    search_query = request.args.get("q", "").strip()
+    solucion_filter = request.args.get("solucionado", "no")
+    risk_filter = request.args.get("risk_type", "todos")
+    if not search_query:
+        return redirect(url_for("index", risk_type=risk_filter, solucionado=solucion_filter))
+    page = max(1, request.args.get("page", 1, type=int))
+    logged_in_user = session.get("username")
+    is_admin = session.get("is_admin", False)
+    post_ids, has_more = search_posts(search_query, risk_filter, solucion_filter, page)
+    # Los resultados cumplen el filtro, así que comparten las tarjetas cacheadas del feed
+    version, _ = feed_version(risk_filter, solucion_filter)
+    next_url = None
+    if has_more:
+        next_url = url_for(
+            "search", q=search_query, risk_type=risk_filter, solucionado=solucion_filter, page=page + 1
+        )
+    return render_template(
+        "index.html",
+        cards=feed_cards([], post_ids, is_admin, (risk_filter, solucion_filter, version)),
+        liked_ids=liked_post_ids(logged_in_user, post_ids),
+        next_url=next_url,
+        search_query=search_query,
+        logged_in_user=logged_in_user,
+        is_admin=is_admin,
+        risk_types=[r[0] for r in RISK_TYPES],
+        risk_filter=risk_filter,
+        solucion_filter=solucion_filter
     )
 
 @app.route("/login", methods=["GET", "POST"])
@@ -223,7 +2142,8 @@ def nuevo_post():
     if request.method == "POST":
         risk_type = request.form["risk_type"]
         descripcion_texto = request.form.get("descripcion", "")[:50]
-        file = request.files["file"]
+        file = request.files.get("file")
+        upload_token = request.form.get("upload_token")
 
         # Calcular score automáticamente
         score = calcular_score(risk_type, descripcion_texto)
@@ -231,8 +2151,32 @@ def nuevo_post():
 
         # Guardar imagen según entorno
         image_path = None
-        if file and file.filename != "":
-            image_path = save_image(file)
+        image = None  # (hash, tamaño, temporal) de una imagen que se deduplica acá
+        if upload_token:
+            # La imagen ya se subió directo al almacenamiento: solo se verifica
+            upload = load_upload(upload_token, session["username"])
+            if upload is None:
+                flash("La subida de la imagen expiró; vuelve a intentarlo.")
+                return redirect(url_for("nuevo_post"))
+            if upload.get("h"):
+                # La imagen ya existía y el navegador no la volvió a subir
+                image = (upload["h"], upload["s"], None)
+            else:
+                size = get_storage().size(upload["k"])
+                if size is None or size != upload["s"]:
+                    flash("La imagen no terminó de subirse; vuelve a intentarlo.")
+                    return redirect(url_for("nuevo_post"))
+                image_path = upload["k"]
+                # El token vale para una sola publicación
+                if db.session.query(Post.id).filter_by(image_path=image_path).first():
+                    flash("Esa imagen ya se usó en otro reporte; vuelve a subirla.")
+                    return redirect(url_for("nuevo_post"))
+        elif file and file.filename != "":
+            if file.mimetype not in IMAGE_EXTENSIONS:
+                flash("Solo se aceptan imágenes JPEG, PNG, WebP o GIF.")
+                return redirect(url_for("nuevo_post"))
+            spooled, digest, size = spool_upload(file)
+            image = (digest, size, spooled)
 
         # Crear nueva publicación con el nombre de usuario
         new_post = Post(
@@ -243,7 +2187,30 @@ def nuevo_post():
             score=score
         )
         db.session.add(new_post)
+        db.session.flush()
+        needs_processing = bool(image_path)
+        if image:
+            digest, size, spooled = image
+            try:
+                needs_processing = attach_image(
+                    new_post, digest, size, spooled, file.mimetype if spooled else None
+                )
+            except FileNotFoundError:
+                db.session.rollback()
+                flash("La imagen ya no está disponible; vuelve a subirla.")
+                return redirect(url_for("nuevo_post"))
+            finally:
+                if spooled is not None:
+                    spooled.close()
+            image_path = new_post.image_path
+        add_post_to_search(new_post.id, new_post.title)
+        bump_risk_stat(justificacion, False, new_post.created_at, posts=1, score=score)
+        bump_feed_version(justificacion, False)
         db.session.commit()
+        feed_cache.invalidate_pages(justificacion, False)
+        publish_event("post", new_post.id, (justificacion, False))
+        if needs_processing:
+            enqueue_image_processing(new_post.id, image_path)
 
         flash(f"Reporte subido con éxito. Riesgo estimado: {score}")
         return redirect(url_for("index"))
@@ -251,16 +2218,68 @@ def nuevo_post():
     # Pasar tipos de riesgo y descripciones al template
     return render_template("nuevo_post.html", risk_types=[(t, d) for (t, d, _) in RISK_TYPES])
 
+@app.route("/uploads", methods=["POST"])
+@login_required
+def create_upload_route():
+    """Prepara una subida directa de imagen: POST prefirmado a S3 o subida por partes local."""
+    data = request.get_json(silent=True) or {}
+    content_type = str(data.get("content_type", "")).lower()
+    try:
+        size = int(data.get("size", 0))
+    except (TypeError, ValueError):
+        size = 0
+    if content_type not in IMAGE_EXTENSIONS:
+        return jsonify({"success": False, "error": "Solo se aceptan imágenes JPEG, PNG, WebP o GIF"}), 400
+    if not 0 < size <= UPLOAD_MAX_SIZE:
+        return jsonify({"success": False, "error": "Tamaño de imagen inválido"}), 400
+    sha256 = str(data.get("sha256") or "").lower()
+    if not re.fullmatch(r"[0-9a-f]{64}", sha256):
+        sha256 = None
+    token, target = create_upload(session["username"], content_type, size, sha256)
+    target.setdefault("url", url_for("upload_chunk", token=token))
+    return jsonify({"success": True, "upload_token": token, "target": target})
+
+@app.route("/uploads/<token>", methods=["GET", "PUT"])
+@login_required
+def upload_chunk(token):
+    """Subida por partes (modo local), reanudable.
+
+    GET devuelve cuántos bytes se recibieron; PUT agrega el trozo indicado en
+    Content-Range, que debe empezar justo donde terminó el anterior.
+    """
+    upload = load_upload(token, session["username"])
+    storage = get_storage()
+    if upload is None or "k" not in upload or not isinstance(storage, LocalStorage):
+        return jsonify({"success": False, "error": "Subida inválida"}), 404
+    key, total = upload["k"], upload["s"]
+    if storage.size(key) is not None:
+        return jsonify({"success": True, "received": total, "complete": True})
+    received = storage.received(key)
+    if request.method == "GET":
+        return jsonify({"success": True, "received": received, "complete": False})
+    content_range = parse_content_range_header(request.headers.get("Content-Range"))
+    if (
+        content_range is None
+        or content_range.length != total
+        or content_range.start != received
+        or request.content_length != content_range.stop - content_range.start
+    ):
+        # El cliente debe continuar desde "received"
+        return jsonify({"success": False, "received": received, "complete": False}), 409
+    received = storage.append_chunk(key, request.stream, request.content_length, total)
+    return jsonify({"success": True, "received": received, "complete": received >= total})
+
 @app.route("/like/<int:post_id>", methods=["POST"])
 @login_required
 def like_post(post_id):
     if "username" not in session:
         return redirect(url_for("login"))
-    existing_like = Like.query.filter_by(post_id=post_id, username=session["username"]).first()
-    if not existing_like:
-        new_like = Like(post_id=post_id, username=session["username"])
-        db.session.add(new_like)
+    if add_like(post_id, session["username"]):
+        filters = touch_post(post_id)
+        likes_count = db.session.query(Post.like_count).filter_by(id=post_id).scalar() or 0
         db.session.commit()
+        invalidate_post_cache(post_id, filters, reorder=True)
+        publish_event("like", post_id, filters, likes=likes_count)
     return redirect(url_for("index"))
 
 @app.route("/like_ajax/<int:post_id>", methods=["POST"])
@@ -268,17 +2287,22 @@ def like_post(post_id):
 def like_post_ajax(post_id):
     if "username" not in session:
         return jsonify({"success": False, "error": "No login"})
-    existing_like = Like.query.filter_by(post_id=post_id, username=session["username"]).first()
-    if not existing_like:
-        new_like = Like(post_id=post_id, username=session["username"])
-        db.session.add(new_like)
-        db.session.commit()
-        liked = True
-    else:
-        db.session.delete(existing_like)
-        db.session.commit()
+    # Alternar el like: un DELETE directo y, si no había nada que borrar, un INSERT
+    removed = Like.query.filter_by(post_id=post_id, username=session["username"]).delete(
+        synchronize_session=False
+    )
+    if removed:
+        bump_counter(post_id, Post.like_count, -1)
         liked = False
-    likes_count = Like.query.filter_by(post_id=post_id).count()
+    else:
+        # Si otra petición lo insertó en paralelo, el like ya existe igualmente
+        add_like(post_id, session["username"])
+        liked = True
+    likes_count = db.session.query(Post.like_count).filter_by(id=post_id).scalar() or 0
+    filters = touch_post(post_id)
+    db.session.commit()
+    invalidate_post_cache(post_id, filters, reorder=True)
+    publish_event("like", post_id, filters, likes=likes_count)
     return jsonify({"success": True, "likes": likes_count, "liked": liked})
 
 @app.route("/comment/<int:post_id>", methods=["POST"])
@@ -287,30 +2311,56 @@ def comment_post(post_id):
     if "username" not in session:
         return redirect(url_for("login"))
     text = request.form["comment_text"]
-    if text.strip():
-        new_comment = Comment(post_id=post_id, username=session["username"], text=text)
-        db.session.add(new_comment)
-        db.session.commit()
-    # Si es AJAX, devolver HTML actualizado
-    if request.headers.get("X-Requested-With") == "XMLHttpRequest":
-        post = Post.query.get_or_404(post_id)
-        comments_html = render_template_string("""
-        {% for comment in post.comments %}
-            <div class="mb-1 d-flex align-items-center">
-                <strong>{{ comment.username }}:</strong> {{ comment.text }}
-                {% if is_admin or comment.username == logged_in_user %}
-                    <form method="POST" action="/delete_comment/{{ comment.id }}" class="ms-2">
-                        <button type="submit" class="btn btn-sm btn-outline-danger" title="Eliminar comentario">
-                            <i class="bi bi-trash"></i>
-                        </button>
-                    </form>
-                {% endif %}
-            </div>
-        {% endfor %}
-        """, post=post, is_admin=session.get("is_admin", False), logged_in_user=session.get("username"))
-        return jsonify({"success": True, "comments_html": comments_html})
+    is_ajax = request.headers.get("X-Requested-With") == "XMLHttpRequest"
+    if not text.strip():
+        if is_ajax:
+            return jsonify({"success": False, "error": "Comentario vacío"})
+        return redirect(url_for("index"))
+    Post.query.get_or_404(post_id)
+    new_comment = Comment(post_id=post_id, username=session["username"], text=text)
+    db.session.add(new_comment)
+    bump_counter(post_id, Post.comment_count, 1)
+    append_comment_to_search(post_id, text)
+    filters = touch_post(post_id)
+    db.session.commit()
+    invalidate_post_cache(post_id, filters)
+    publish_event("comment", post_id, filters, comment_id=new_comment.id)
+    # Si es AJAX, devolver solo el HTML del comentario nuevo
+    if is_ajax:
+        comment_html = render_template(
+            "comment.html",
+            comment=new_comment,
+            is_admin=session.get("is_admin", False),
+            logged_in_user=session.get("username"),
+        )
+        return jsonify({"success": True, "comment_id": new_comment.id, "comment_html": comment_html})
     return redirect(url_for("index"))
 
+@app.route("/comments/<int:post_id>")
+@login_required
+def list_comments(post_id):
+    """Comentarios de una publicación posteriores a ?since=<comment_id>, en HTML."""
+    since = request.args.get("since", 0, type=int)
+    comments = (
+        Comment.query.filter(Comment.post_id == post_id, Comment.id > since)
+        .order_by(Comment.id)
+        .all()
+    )
+    comments_html = "".join(
+        render_template(
+            "comment.html",
+            comment=comment,
+            is_admin=session.get("is_admin", False),
+            logged_in_user=session.get("username"),
+        )
+        for comment in comments
+    )
+    return jsonify({
+        "success": True,
+        "comments_html": comments_html,
+        "last_id": comments[-1].id if comments else since,
+    })
+
 @app.route("/delete/<int:post_id>", methods=["POST"])
 @login_required
 def delete_post(post_id):
@@ -320,8 +2370,28 @@ def delete_post(post_id):
     # Permite eliminar si es admin o el autor
     if not (is_admin or post.username == username):
         return redirect(url_for("index"))
-    db.session.delete(post)
+    # Fuera de la sesión: sus atributos siguen disponibles después del commit
+    db.session.expunge(post)
+    # Una sentencia por tabla, sin cargar las filas. ON DELETE CASCADE haría lo
+    # mismo, pero SQLite no aplica las claves foráneas por defecto.
+    Like.query.filter_by(post_id=post.id).delete(synchronize_session=False)
+    Comment.query.filter_by(post_id=post.id).delete(synchronize_session=False)
+    Post.query.filter_by(id=post.id).delete(synchronize_session=False)
+    # Los archivos se borran solo si ninguna otra publicación usa la imagen; las
+    # filas sin hash (anteriores a la deduplicación) no comparten la suya
+    orphan_keys = set()
+    if post.image_hash is None or release_image(post.image_hash):
+        orphan_keys = {
+            key for key in image_keys(post.image_path, post.image_renditions)
+            if not key.startswith(("http://", "https://"))
+        }
+    remove_posts_from_search([post.id])
+    bump_risk_stat(post.descripcion, post.solucionado, post.created_at, posts=-1, score=-(post.score or 0))
+    bump_feed_version(post.descripcion, post.solucionado)
     db.session.commit()
+    feed_cache.invalidate_post(post.id, post.descripcion, post.solucionado, reorder=True)
+    publish_event("delete", post.id)
+    enqueue_image_deletion(orphan_keys)
     return redirect(url_for("index"))
 
 @app.route("/delete_comment/<int:comment_id>", methods=["POST"])
@@ -334,7 +2404,13 @@ def delete_comment(comment_id):
     if not (is_admin or comment.username == username):
         return redirect(url_for("index"))
     db.session.delete(comment)
+    bump_counter(comment.post_id, Post.comment_count, -1)
+    db.session.flush()
+    index_posts_for_search([comment.post_id])
+    filters = touch_post(comment.post_id)
     db.session.commit()
+    invalidate_post_cache(comment.post_id, filters)
+    publish_event("update", comment.post_id, filters)
     return redirect(url_for("index"))
 
 @app.route("/update_score/<int:post_id>", methods=["POST"])
@@ -347,8 +2423,12 @@ def update_score(post_id):
     try:
         score = int(request.form.get("score", 5))
         if 0 <= score <= 5:
+            bump_risk_stat(post.descripcion, post.solucionado, post.created_at, score=score - (post.score or 0))
             post.score = score
+            bump_feed_version(post.descripcion, post.solucionado)
             db.session.commit()
+            feed_cache.invalidate_post(post.id, post.descripcion, post.solucionado, reorder=True)
+            publish_event("score", post.id, (post.descripcion, post.solucionado), score=score)
             flash("Puntaje actualizado.")
         else:
             flash("El puntaje debe estar entre 0 y 5.")
@@ -363,11 +2443,137 @@ def marcar_solucionado(post_id):
         flash("Solo el administrador puede marcar como solucionado.")
         return redirect(url_for("index"))
     post = Post.query.get_or_404(post_id)
+    if not post.solucionado:
+        # Pasa del resumen de pendientes al de solucionados
+        bump_risk_stat(post.descripcion, False, post.created_at, posts=-1, score=-(post.score or 0))
+        bump_risk_stat(post.descripcion, True, post.created_at, posts=1, score=post.score or 0)
     post.solucionado = True
+    post.solved_at = post.solved_at or datetime.utcnow()
+    bump_feed_version(post.descripcion, False)
+    bump_feed_version(post.descripcion, True)
     db.session.commit()
+    # Sale del feed de pendientes y entra en el de solucionados
+    feed_cache.invalidate_post(post.id, post.descripcion, False, reorder=True)
+    feed_cache.invalidate_pages(post.descripcion, True)
+    publish_event("solved", post.id, (post.descripcion, True))
     flash("Publicación marcada como solucionada.")
     return redirect(url_for("index"))
 
+@app.route("/restore/<int:post_id>", methods=["POST"])
+@login_required
+def restore_post(post_id):
+    if not session.get("is_admin"):
+        flash("Solo el administrador puede restaurar reportes archivados.")
+        return redirect(url_for("index"))
+    rows, conflicts = restore_posts([post_id])
+    db.session.commit()
+    if conflicts:
+        flash("No se puede restaurar: su id ya lo usa otro reporte activo.")
+        return redirect(url_for("index", solucionado="si"))
+    if not rows:
+        flash("El reporte no está archivado.")
+        return redirect(url_for("index", solucionado="si"))
+    invalidate_moved_posts(rows)
+    flash("Reporte restaurado del archivo.")
+    return redirect(url_for("index", solucionado="si"))
+
+@app.route("/posts/<int:post_id>/card")
+@login_required
+def post_card(post_id):
+    """Tarjeta completa de una publicación para el usuario actual (para actualizar el feed en vivo)."""
+    is_admin = session.get("is_admin", False)
+    logged_in_user = session.get("username")
+    # Sin filtro conocido no hay versión con la que validar la caché: siempre desde la base
+    cards = feed_cards([], [post_id], is_admin)
+    if not cards:
+        return "", 404
+    return render_template(
+        "feed_item.html",
+        post=cards[0],
+        liked_ids=liked_post_ids(logged_in_user, [post_id]),
+        logged_in_user=logged_in_user,
+        is_admin=is_admin,
+    )
+
+@app.route("/stream")
+@login_required
+def event_stream():
+    """Stream de Server-Sent Events con los cambios del feed."""
+    keepalive = app.config["SSE_KEEPALIVE"]
+
+    def generate():
+        # Suscribirse recién al empezar a iterar: si la respuesta se cierra antes,
+        # el finally no corre y la cola quedaría registrada para siempre
+        subscription = broker.subscribe()
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    event = subscription.get(timeout=keepalive)
+                except queue.Empty:
+                    # Comentario SSE: mantiene viva la conexión a través de proxies
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            broker.unsubscribe(subscription)
+
+    return Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.route("/dashboard")
+@login_required
+def dashboard():
+    if not session.get("is_admin"):
+        flash("Solo el administrador puede ver las estadísticas.")
+        return redirect(url_for("index"))
+    by_risk, weekly = dashboard_summary()
+    return render_template("dashboard.html", by_risk=by_risk, weekly=weekly)
+
+@app.route("/export")
+@login_required
+def export_posts_download():
+    """Descarga de todas las publicaciones, generada a medida que se envía."""
+    if not session.get("is_admin"):
+        flash("Solo el administrador puede exportar los reportes.")
+        return redirect(url_for("index"))
+    fmt = request.args.get("format", "csv")
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"success": False, "error": "Formato no soportado"}), 400
+    filename = f"reportes-{datetime.utcnow():%Y%m%d}.{fmt}"
+    return Response(
+        stream_with_context(export_chunks(fmt)),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@app.route("/cache_stats")
+@login_required
+def cache_stats():
+    if not session.get("is_admin"):
+        return jsonify({"success": False, "error": "Solo administradores"}), 403
+    return jsonify(feed_cache.stats())
+
+@app.route("/metrics")
+def metrics_endpoint():
+    """Métricas en formato Prometheus."""
+    token = app.config["METRICS_TOKEN"]
+    if token and request.headers.get("Authorization") != f"Bearer {token}":
+        return Response("No autorizado\n", status=401, mimetype="text/plain")
+    stats = feed_cache.stats()
+    body = metrics.render() + (
+        "# HELP feed_cache_hits_total Aciertos de la caché del feed.\n"
+        "# TYPE feed_cache_hits_total counter\n"
+        f"feed_cache_hits_total {stats['hits']}\n"
+        "# HELP feed_cache_misses_total Fallos de la caché del feed.\n"
+        "# TYPE feed_cache_misses_total counter\n"
+        f"feed_cache_misses_total {stats['misses']}\n"
+    )
+    return Response(body, mimetype="text/plain; version=0.0.4")
+
 @app.route("/logout")
 def logout():
     session.clear()
@@ -399,21 +2605,302 @@ def change_admin_password():
     db.session.commit()
     print(f"Contraseña actualizada para el administrador '{username}'.")
 
-if __name__ == "__main__":
-    # Configuración de logging
-    logging.basicConfig(
-        level=logging.INFO,  # Cambia a logging.ERROR en producción si prefieres menos información
-        format="%(asctime)s %(levelname)s %(name)s %(threadName)s : %(message)s",
-        handlers=[
-            logging.FileHandler("app.log"),  # Guarda logs en app.log
-            logging.StreamHandler()          # Muestra logs en consola
-        ]
+@app.cli.command("reconcile-counters")
+def reconcile_counters():
+    """Recalcula like_count y comment_count de todas las publicaciones a partir de Like/Comment."""
+    likes = select(func.count(Like.id)).where(Like.post_id == Post.id).scalar_subquery()
+    comments = select(func.count(Comment.id)).where(Comment.post_id == Post.id).scalar_subquery()
+    drift = Post.query.filter(
+        (Post.like_count != likes) | (Post.comment_count != comments)
+    ).count()
+    Post.query.update(
+        {Post.like_count: likes, Post.comment_count: comments}, synchronize_session=False
     )
+    bump_all_feed_versions()
+    db.session.commit()
+    feed_cache.invalidate_all()
+    print(f"Contadores recalculados. Publicaciones con diferencias: {drift}")
+
+@app.cli.command("rescore-posts")
+@click.option("--batch-size", default=500, show_default=True, help="Publicaciones por lote.")
+def rescore_posts(batch_size):
+    """Recalcula el score de todas las publicaciones con las palabras clave actuales.
+
+    Recorre la tabla por lotes ordenados por id, así que no carga todo en memoria.
+    Sobrescribe también los puntajes ajustados manualmente por un administrador.
+    """
+    last_id = 0
+    revisadas = cambiadas = 0
+    while True:
+        rows = (
+            db.session.query(Post.id, Post.descripcion, Post.title, Post.score)
+            .filter(Post.id > last_id)
+            .order_by(Post.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+        cambios = []
+        for post_id, risk_type, title, score in rows:
+            nuevo = calcular_score(risk_type, title)
+            if nuevo != score:
+                cambios.append({"id": post_id, "score": nuevo})
+        if cambios:
+            db.session.bulk_update_mappings(Post, cambios)
+        db.session.commit()
+        revisadas += len(rows)
+        cambiadas += len(cambios)
+        last_id = rows[-1][0]
+    rebuild_risk_stats()
+    bump_all_feed_versions()
+    db.session.commit()
+    feed_cache.invalidate_all()
+    print(f"Publicaciones revisadas: {revisadas}. Puntajes modificados: {cambiadas}")
+
+@app.cli.command("archive-solved")
+@click.option("--older-than-days", default=ARCHIVE_AFTER_DAYS, show_default=True,
+              help="Archivar los solucionados hace más de estos días.")
+@click.option("--batch-size", default=200, show_default=True, help="Publicaciones por transacción.")
+@click.option("--pause", default=0.0, show_default=True, help="Segundos de espera entre lotes.")
+def archive_solved(older_than_days, batch_size, pause):
+    """Mueve al archivo los reportes solucionados antiguos, por lotes cortos.
+
+    Se puede correr con la aplicación en marcha: cada lote es una transacción
+    breve y las filas que cambian entre medio se vuelven a verificar.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    solved_at = func.coalesce(Post.solved_at, Post.created_at)
+    last_id = 0
+    archivadas = 0
+    while True:
+        ids = [
+            post_id for (post_id,) in
+            db.session.query(Post.id)
+            .filter(Post.solucionado.is_(True), solved_at < cutoff, Post.id > last_id)
+            .order_by(Post.id)
+            .limit(batch_size)
+        ]
+        if not ids:
+            break
+        rows = archive_posts(ids)
+        db.session.commit()
+        invalidate_moved_posts(rows)
+        archivadas += len(rows)
+        last_id = ids[-1]
+        if pause:
+            time.sleep(pause)
+    print(f"Publicaciones archivadas: {archivadas}")
+
+@app.cli.command("restore-posts")
+@click.argument("post_ids", nargs=-1, type=int, required=True)
+def restore_posts_command(post_ids):
+    """Devuelve publicaciones archivadas a las tablas activas."""
+    rows, conflicts = restore_posts(list(post_ids))
+    db.session.commit()
+    invalidate_moved_posts(rows)
+    print(f"Publicaciones restauradas: {len(rows)}")
+    if conflicts:
+        print(f"Sin restaurar por ids ya usados en las tablas activas: {', '.join(map(str, conflicts))}")
+
+@app.cli.command("sweep-orphans")
+@click.option("--batch-size", default=1000, show_default=True, help="Filas u objetos por lote.")
+@click.option("--grace-seconds", default=UPLOAD_TOKEN_MAX_AGE, show_default=True,
+              help="No borrar archivos más nuevos que esto (subidas en curso).")
+@click.option("--dry-run", is_flag=True, help="Solo informar, sin borrar nada.")
+def sweep_orphans(batch_size, grace_seconds, dry_run):
+    """Borra likes, comentarios, registros de imágenes y archivos que ya no usa ninguna publicación."""
+    for model, parent in (
+        (Like, Post), (Comment, Post), (ArchivedLike, ArchivedPost), (ArchivedComment, ArchivedPost),
+    ):
+        print(f"{model.__tablename__}: {sweep_orphan_rows(model, parent, batch_size, dry_run)} filas huérfanas")
+    removed, fixed = reconcile_image_blobs(batch_size, dry_run)
+    print(f"image_blob: {removed} sin uso, {fixed} contadores corregidos")
+    files, reclaimed = sweep_orphan_images(batch_size, grace_seconds, dry_run)
+    accion = "se liberarían" if dry_run else "liberados"
+    print(f"Archivos huérfanos: {files} ({reclaimed / 1024 ** 2:.2f} MB {accion})")
+
+@app.cli.command("rebuild-stats")
+def rebuild_stats():
+    """Reconstruye desde cero el resumen de estadísticas por tipo de riesgo y semana."""
+    filas = rebuild_risk_stats()
+    db.session.commit()
+    print(f"Filas de estadísticas generadas: {filas}")
+
+@app.cli.command("image-dedup-report")
+def image_dedup_report():
+    """Muestra cuántas imágenes se reutilizan y cuánto almacenamiento se ahorra."""
+    blobs, references, stored, logical = db.session.query(
+        func.count(ImageBlob.sha256),
+        func.coalesce(func.sum(ImageBlob.ref_count), 0),
+        func.coalesce(func.sum(ImageBlob.size), 0),
+        func.coalesce(func.sum(ImageBlob.size * ImageBlob.ref_count), 0),
+    ).one()
+    saved = logical - stored
+    print(f"Imágenes únicas: {blobs}. Publicaciones que las usan: {references}")
+    print(f"Originales distintos: {stored / 1024 ** 2:.2f} MB de {logical / 1024 ** 2:.2f} MB recibidos")
+    print(f"Ahorro por deduplicación: {saved / 1024 ** 2:.2f} MB ({100 * saved / logical if logical else 0:.1f}%)")
+
+@app.cli.command("rebuild-search-index")
+@click.option("--batch-size", default=500, show_default=True, help="Publicaciones por lote.")
+def rebuild_search_index(batch_size):
+    """Reconstruye el índice de búsqueda de texto completo a partir de Post y Comment."""
+    if not search_dialect():
+        print(f"El motor {db.engine.dialect.name} no tiene índice de texto completo; nada que hacer.")
+        return
+    with db.engine.begin() as conn:
+        conn.execute(text(SEARCH_DDL[search_dialect()]))
+    last_id = 0
+    total = 0
+    while True:
+        ids = [
+            post_id for (post_id,) in
+            db.session.query(Post.id).filter(Post.id > last_id).order_by(Post.id).limit(batch_size)
+        ]
+        if not ids:
+            break
+        index_posts_for_search(ids)
+        db.session.commit()
+        total += len(ids)
+        last_id = ids[-1]
+    print(f"Publicaciones indexadas: {total}")
+
+@app.cli.command("export-posts")
+@click.option("--format", "fmt", type=click.Choice(list(EXPORT_FORMATS)), default="csv", show_default=True)
+@click.option("--output", type=click.File("w", encoding="utf-8"), default="-", help="Archivo de salida (por defecto, stdout).")
+@click.option("--batch-size", default=1000, show_default=True, help="Filas leídas por vuelta del cursor.")
+def export_posts(fmt, output, batch_size):
+    """Exporta todas las publicaciones en csv o ndjson."""
+    for chunk in export_chunks(fmt, batch_size):
+        output.write(chunk)
+
+@app.cli.command("import-posts")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "fmt", type=click.Choice(list(EXPORT_FORMATS)), help="Por defecto, según la extensión.")
+@click.option("--batch-size", default=500, show_default=True, help="Filas por INSERT.")
+def import_posts(path, fmt, batch_size):
+    """Importa publicaciones desde un archivo csv o ndjson (como el de export-posts).
+
+    Los ids se asignan de nuevo. Si una fila no trae puntaje se calcula con
+    calcular_score; las filas inválidas se informan y se saltean.
+    """
+    fmt = fmt or ("ndjson" if path.endswith((".ndjson", ".jsonl")) else "csv")
+    start_id = db.session.query(func.max(Post.id)).scalar() or 0
+    started = time.perf_counter()
+    importadas = 0
+    invalidas = 0
+    lote = []
+    try:
+        with open(path, newline="", encoding="utf-8") as stream:
+            for line_no, record in enumerate(read_import_rows(stream, fmt), start=1):
+                try:
+                    lote.append(import_row(record))
+                except (ValueError, TypeError) as e:
+                    invalidas += 1
+                    print(f"Fila {line_no} ignorada: {e}")
+                    continue
+                if len(lote) >= batch_size:
+                    # Un único executemany por lote en lugar de un INSERT por fila
+                    db.session.execute(insert(Post), lote)
+                    db.session.commit()
+                    importadas += len(lote)
+                    lote = []
+            if lote:
+                db.session.execute(insert(Post), lote)
+                db.session.commit()
+                importadas += len(lote)
+    finally:
+        # También si la importación se cortó: los lotes ya confirmados quedan
+        # indexados, contados en las estadísticas y visibles en el feed
+        db.session.rollback()
+        last_id = start_id
+        while True:
+            ids = [
+                post_id for (post_id,) in
+                db.session.query(Post.id).filter(Post.id > last_id).order_by(Post.id).limit(batch_size)
+            ]
+            if not ids:
+                break
+            index_posts_for_search(ids)
+            db.session.commit()
+            last_id = ids[-1]
+        rebuild_risk_stats()
+        bump_all_feed_versions()
+        db.session.commit()
+        feed_cache.invalidate_all()
+        elapsed = time.perf_counter() - started
+        print(
+            f"Publicaciones importadas: {importadas} en {elapsed:.1f} s "
+            f"({importadas / elapsed if elapsed else 0:.0f} filas/s). Filas inválidas: {invalidas}"
+        )
+
+@app.cli.command("seed-data")
+@click.option("--posts", default=1000, show_default=True, help="Cantidad de publicaciones a generar.")
+@click.option("--users", default=50, show_default=True, help="Cantidad de usuarios distintos.")
+@click.option("--seed", default=42, show_default=True, help="Semilla para obtener siempre los mismos datos.")
+def seed_data(posts, users, seed):
+    """Genera publicaciones sintéticas con likes y comentarios para pruebas de carga.
+
+    Pocas publicaciones concentran la mayoría de los likes y comentarios
+    (distribución de Pareto), como ocurre con los reportes reales.
+    """
+    rng = random.Random(seed)
+    usernames = [f"usuario{i}" for i in range(users)]
+    tipos = [t for t, _, _ in RISK_TYPES]
+    # Los riesgos más comunes en la escuela aparecen más seguido
+    pesos_tipo = [5, 3, 1, 2, 2, 4, 1, 5, 3, 4]
+    ahora = datetime.utcnow()
+    batch_size = 500
+    creadas = 0
+    while creadas < posts:
+        lote = []
+        for _ in range(min(batch_size, posts - creadas)):
+            risk_type = rng.choices(tipos, weights=pesos_tipo)[0]
+            palabras = [k for k, _ in RISK_KEYWORDS[risk_type]]
+            title = " ".join(rng.sample(palabras, rng.randint(1, 3)) + ["en el aula", str(rng.randint(1, 30))])[:50]
+            lote.append(Post(
+                title=title,
+                image_path="uploads/seed-placeholder.jpg",
+                created_at=ahora - timedelta(minutes=rng.randint(0, 180 * 24 * 60)),
+                username=rng.choice(usernames),
+                descripcion=risk_type,
+                score=calcular_score(risk_type, title),
+                solucionado=rng.random() < 0.3,
+            ))
+        db.session.add_all(lote)
+        db.session.flush()
+        likes, comments = [], []
+        for post in lote:
+            n_likes = min(users, int(rng.paretovariate(1.5)) - 1)
+            n_comments = min(20, int(rng.paretovariate(2.0)) - 1)
+            likes += [{"post_id": post.id, "username": u} for u in rng.sample(usernames, n_likes)]
+            comments += [
+                {"post_id": post.id, "username": rng.choice(usernames), "text": f"Comentario {i + 1}"}
+                for i in range(n_comments)
+            ]
+            post.like_count = n_likes
+            post.comment_count = n_comments
+        # Inserción por lotes (executemany) en lugar de un INSERT por fila
+        if likes:
+            db.session.execute(insert(Like), likes)
+        if comments:
+            db.session.execute(insert(Comment), comments)
+        index_posts_for_search([post.id for post in lote])
+        db.session.commit()
+        creadas += len(lote)
+    rebuild_risk_stats()
+    bump_all_feed_versions()
+    db.session.commit()
+    feed_cache.invalidate_all()
+    print(f"Publicaciones generadas: {creadas}")
+
+if __name__ == "__main__":
+    # El logging ya quedó configurado al importar (ver configure_logging)
     with app.app_context():
         db.create_all()
     env = os.getenv("FLASK_ENV", "development")
     if env == "development":
         app.run(host="0.0.0.0", port=5000, debug=True)
-    # En producción, gunicorn/nginx se encargan de ejecutar la app
+    # En producción: gunicorn -c gunicorn.conf.py wsgi:app (ver gunicorn.conf.py)
 
 
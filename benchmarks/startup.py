@@ -0,0 +1,151 @@
+"""Presupuesto de arranque: tiempo de import y memoria de un proceso de la app.
+
+Cada medición importa `app` en un proceso nuevo (como un comando `flask` o un
+worker de gunicorn sin preload) con `python -X importtime`, y registra:
+
+- import_ms: tiempo acumulado de importar el módulo (según -X importtime)
+- rss_mb: memoria residente después del import
+- rss_request_mb: memoria residente después de atender un GET / de prueba
+- heavy_modules: módulos pesados que no deberían cargarse en esta configuración
+
+    # Guardar la línea base
+    python benchmarks/startup.py --save-baseline
+
+    # Comparar; termina con código 1 si se supera el presupuesto
+    python benchmarks/startup.py --compare
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(ROOT, "benchmarks", "startup_baseline.json")
+
+# Con almacenamiento local y sin `flask db`, ninguno de estos debe importarse
+HEAVY_MODULES = ("boto3", "botocore", "s3transfer", "PIL", "alembic", "flask_migrate")
+
+# Se ejecuta en el proceso medido; imprime una línea JSON al final
+PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import {module}
+wall_ms = (time.perf_counter() - t0) * 1000
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+rss = rss_mb()
+from app import app, db
+with app.app_context():
+    db.create_all()
+client = app.test_client()
+with client.session_transaction() as session:
+    session["username"] = "startup"
+status = client.get("/").status_code
+print(json.dumps({{
+    "wall_ms": wall_ms,
+    "rss_mb": rss,
+    "rss_request_mb": rss_mb(),
+    "status": status,
+    "heavy_modules": sorted(m for m in {heavy!r} if m in sys.modules),
+}}))
+"""
+
+
+def importtime_ms(stderr, module):
+    """Tiempo acumulado (ms) del módulo de primer nivel en la salida de -X importtime."""
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        # Los submódulos vienen indentados; el de primer nivel lleva un solo espacio
+        if name.rstrip() == f" {module}" and cumulative_us.strip().isdigit():
+            return int(cumulative_us) / 1000
+    return None
+
+
+def measure(module="app"):
+    workdir = tempfile.mkdtemp(prefix="startup-")
+    env = dict(
+        os.environ,
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{os.path.join(workdir, 'startup.db')}",
+        UPLOAD_FOLDER=os.path.join(workdir, "uploads"),
+        STORAGE_BACKEND="local",
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"La medición falló:\n{result.stderr[-2000:]}")
+    data = json.loads(result.stdout.strip().splitlines()[-1])
+    if data["status"] != 200:
+        raise SystemExit(f"GET / respondió {data['status']}")
+    data["import_ms"] = importtime_ms(result.stderr, module) or data["wall_ms"]
+    return data
+
+
+def run(args):
+    samples = [measure() for _ in range(args.runs)]
+    return {
+        "import_ms": round(statistics.median(s["import_ms"] for s in samples), 1),
+        "rss_mb": round(statistics.median(s["rss_mb"] for s in samples), 1),
+        "rss_request_mb": round(statistics.median(s["rss_request_mb"] for s in samples), 1),
+        "heavy_modules": samples[-1]["heavy_modules"],
+    }
+
+
+def compare(result, baseline, tolerance):
+    """Devuelve la lista de regresiones respecto de la línea base."""
+    regressions = []
+    for field in ("import_ms", "rss_mb", "rss_request_mb"):
+        limit = baseline[field] * (1 + tolerance)
+        if result[field] > limit:
+            regressions.append(f"{field}: {baseline[field]} -> {result[field]} (límite {limit:.1f})")
+    if result["heavy_modules"]:
+        regressions.append(f"módulos pesados importados al arrancar: {', '.join(result['heavy_modules'])}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Procesos medidos (se toma la mediana).")
+    parser.add_argument("--save-baseline", action="store_true", help="Guardar el resultado como línea base.")
+    parser.add_argument("--compare", action="store_true", help="Comparar contra la línea base guardada.")
+    parser.add_argument("--tolerance", type=float, default=0.20, help="Aumento tolerado (0.20 = 20%%).")
+    args = parser.parse_args()
+
+    result = run(args)
+    print(f"Import de app: {result['import_ms']} ms")
+    print(f"RSS tras el import: {result['rss_mb']} MB; tras un GET /: {result['rss_request_mb']} MB")
+    print(f"Módulos pesados cargados: {', '.join(result['heavy_modules']) or 'ninguno'}")
+
+    if args.save_baseline:
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(result, f, indent=2)
+            f.write("\n")
+        print(f"Línea base guardada en {BASELINE_PATH}")
+
+    if args.compare:
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.tolerance)
+        if regressions:
+            print("Fuera del presupuesto de arranque:")
+            for line in regressions:
+                print(f"  - {line}")
+            sys.exit(1)
+        print("Dentro del presupuesto de arranque.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Configuración de gunicorn para producción.
+
+La cantidad de workers se calcula a partir de los límites de CPU y memoria del
+contenedor (cgroups), para no superar los 256M definidos en compose.yml.
+Todos los valores se pueden forzar con variables de entorno.
+"""
+import math
+import os
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def cpu_limit():
+    """CPUs disponibles, respetando la cuota del contenedor si existe."""
+    cpu_max = _read("/sys/fs/cgroup/cpu.max")  # cgroups v2: "<cuota> <periodo>"
+    if cpu_max:
+        quota, period = cpu_max.split()
+        if quota != "max":
+            return max(1, math.ceil(int(quota) / int(period)))
+    quota = _read("/sys/fs/cgroup/cpu/cpu.cfs_quota_us")  # cgroups v1
+    period = _read("/sys/fs/cgroup/cpu/cpu.cfs_period_us")
+    if quota and period and int(quota) > 0:
+        return max(1, math.ceil(int(quota) / int(period)))
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def memory_limit_mb():
+    """Límite de memoria del contenedor en MB, o None si no hay límite."""
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        raw = _read(path)
+        # cgroups v1 informa un número enorme cuando no hay límite
+        if raw and raw != "max" and int(raw) < 1 << 60:
+            return int(raw) // (1024 * 1024)
+    return None
+
+
+def worker_count():
+    if os.getenv("WEB_CONCURRENCY"):
+        return int(os.getenv("WEB_CONCURRENCY"))
+    # Las greenlets (o los hilos de gthread) cubren la espera de E/S, así que más
+    # procesos que CPUs solo agregan memoria y cambios de contexto (ver README)
+    by_cpu = cpu_limit()
+    limit = memory_limit_mb()
+    if limit is None:
+        return by_cpu
+    # Memoria del master con la app precargada y la que agrega cada worker
+    # (el resto se comparte con el master por copy-on-write)
+    base_mb = int(os.getenv("GUNICORN_BASE_MEMORY_MB", 80))
+    per_worker_mb = int(os.getenv("GUNICORN_WORKER_MEMORY_MB", 40))
+    by_memory = (limit - base_mb) // per_worker_mb
+    return max(1, min(by_cpu, by_memory))
+
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = worker_count()
+# gevent por defecto: cada pestaña del feed deja abierta una conexión a /stream
+# (eventos en vivo) y con gevent es una greenlet, no uno de los pocos hilos de
+# gthread que atienden likes, publicaciones y páginas.
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gevent")
+# Solo para gthread: las peticiones pasan la mayor parte del tiempo esperando a MySQL/S3
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", 1000))
+
+if worker_class == "gevent":
+    # Con preload_app la app se importa en el master, antes de que el worker
+    # parchee: hay que hacerlo acá para que sus locks, colas e hilos (broker,
+    # caché, logging, pool de imágenes) ya sean de gevent.
+    from gevent import monkey
+
+    monkey.patch_all()
+
+# Cargar la app una vez en el master y compartir su memoria con los workers
+preload_app = True
+
+# Reciclar workers de a poco para contener fugas de memoria, sin reiniciarlos todos juntos
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 2000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 500))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+
+# Mantener abiertas las conexiones del navegador/proxy entre peticiones
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+
+# La app ya registra cada petición como JSON (con id, ruta, usuario y duración);
+# GUNICORN_ACCESSLOG=- activa además el log de acceso de gunicorn
+accesslog = os.getenv("GUNICORN_ACCESSLOG")
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    # Las conexiones abiertas por el master (si las hubo) no deben compartirse entre procesos
+    from app import app, db
+
+    with app.app_context():
+        db.engine.dispose(close=False)
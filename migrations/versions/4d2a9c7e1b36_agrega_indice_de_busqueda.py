@@ -0,0 +1,38 @@
+"""Agrega índice de texto completo post_search
+
+Revision ID: 4d2a9c7e1b36
+Revises: e91b4d7c2f08
+Create Date: 2026-10-17 18:02:47.511903
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '4d2a9c7e1b36'
+down_revision = 'e91b4d7c2f08'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # La tabla depende del motor (FULLTEXT en MySQL, FTS5 en SQLite); después
+    # de migrar hay que poblarla con `flask rebuild-search-index`.
+    if op.get_bind().dialect.name == 'mysql':
+        op.execute(
+            "CREATE TABLE IF NOT EXISTS post_search ("
+            "post_id INTEGER NOT NULL PRIMARY KEY, "
+            "title VARCHAR(200), "
+            "comments MEDIUMTEXT, "
+            "FULLTEXT KEY ft_post_search (title, comments)"
+            ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci"
+        )
+    elif op.get_bind().dialect.name == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS post_search "
+            "USING fts5(title, comments, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS post_search")
@@ -0,0 +1,35 @@
+"""Agrega contadores de likes y comentarios a Post
+
+Revision ID: 5b7e2c9d4a1f
+Revises: 902351149b55
+Create Date: 2026-10-17 10:12:41.518203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b7e2c9d4a1f'
+down_revision = '902351149b55'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('like_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('comment_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Rellenar los contadores con los datos existentes
+    op.execute(
+        'UPDATE post SET '
+        'like_count = (SELECT COUNT(*) FROM `like` WHERE `like`.post_id = post.id), '
+        'comment_count = (SELECT COUNT(*) FROM comment WHERE comment.post_id = post.id)'
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.drop_column('comment_count')
+        batch_op.drop_column('like_count')
@@ -0,0 +1,26 @@
+"""Agrega versiones redimensionadas de la imagen a Post
+
+Revision ID: 7a4f0b12e9c5
+Revises: c3d81f6a0e27
+Create Date: 2026-10-17 12:20:07.663190
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a4f0b12e9c5'
+down_revision = 'c3d81f6a0e27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('image_renditions', sa.JSON(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.drop_column('image_renditions')
@@ -0,0 +1,49 @@
+"""Agrega ON DELETE CASCADE a las claves foráneas de like y comment hacia post
+
+Revision ID: a83e5f1c7d29
+Revises: f2a86c3d9e14
+Create Date: 2026-10-17 22:41:12.508213
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a83e5f1c7d29'
+down_revision = 'f2a86c3d9e14'
+branch_labels = None
+depends_on = None
+
+# Las claves originales no tienen nombre: MySQL las llama like_ibfk_1, etc. y en
+# SQLite se les asigna uno con esta convención para poder recrear la tabla.
+NAMING_CONVENTION = {
+    "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s",
+}
+
+
+def _post_fk_name(table):
+    for fk in sa.inspect(op.get_bind()).get_foreign_keys(table):
+        if fk['referred_table'] == 'post' and fk['constrained_columns'] == ['post_id']:
+            return fk['name'] or f'fk_{table}_post_id_post'
+    return None
+
+
+def _recreate_post_fk(table, ondelete):
+    name = _post_fk_name(table)
+    with op.batch_alter_table(table, schema=None, naming_convention=NAMING_CONVENTION) as batch_op:
+        if name:
+            batch_op.drop_constraint(name, type_='foreignkey')
+        batch_op.create_foreign_key(
+            f'fk_{table}_post_id_post', 'post', ['post_id'], ['id'], ondelete=ondelete
+        )
+
+
+def upgrade():
+    _recreate_post_fk('like', 'CASCADE')
+    _recreate_post_fk('comment', 'CASCADE')
+
+
+def downgrade():
+    _recreate_post_fk('comment', None)
+    _recreate_post_fk('like', None)
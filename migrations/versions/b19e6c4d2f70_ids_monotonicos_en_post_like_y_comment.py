@@ -0,0 +1,52 @@
+"""Ids monotónicos en post, like y comment para no reutilizar los archivados
+
+Revision ID: b19e6c4d2f70
+Revises: a83e5f1c7d29
+Create Date: 2026-10-17 23:58:04.117350
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b19e6c4d2f70'
+down_revision = 'a83e5f1c7d29'
+branch_labels = None
+depends_on = None
+
+# Tabla activa -> tabla de archivo que comparte sus ids
+TABLES = {'post': 'archived_post', 'like': 'archived_like', 'comment': 'archived_comment'}
+
+
+def _recreate(table, autoincrement):
+    # SQLite solo admite AUTOINCREMENT al crear la tabla
+    with op.batch_alter_table(
+        table, recreate='always', table_kwargs={'sqlite_autoincrement': autoincrement}
+    ) as batch_op:
+        pass
+
+
+def upgrade():
+    bind = op.get_bind()
+    quote = bind.dialect.identifier_preparer.quote
+    if bind.dialect.name == 'sqlite':
+        for table in TABLES:
+            _recreate(table, True)
+    # El contador arranca después del id más alto, activo o archivado
+    for table, archive in TABLES.items():
+        top = bind.execute(sa.text(
+            f'SELECT MAX(id) FROM (SELECT id FROM {quote(table)} UNION ALL SELECT id FROM {archive}) AS ids'
+        )).scalar() or 0
+        if bind.dialect.name == 'sqlite':
+            bind.execute(sa.text('DELETE FROM sqlite_sequence WHERE name = :name'), {'name': table})
+            bind.execute(sa.text('INSERT INTO sqlite_sequence (name, seq) VALUES (:name, :seq)'),
+                         {'name': table, 'seq': top})
+        elif bind.dialect.name == 'mysql':
+            op.execute(f'ALTER TABLE {quote(table)} AUTO_INCREMENT = {top + 1}')
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        for table in reversed(list(TABLES)):
+            _recreate(table, False)
@@ -0,0 +1,32 @@
+"""Agrega tabla risk_stat con el resumen para /dashboard
+
+Revision ID: b6e3f18a0d52
+Revises: 4d2a9c7e1b36
+Create Date: 2026-10-17 18:47:13.208671
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6e3f18a0d52'
+down_revision = '4d2a9c7e1b36'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Después de migrar, poblarla con `flask rebuild-stats`
+    op.create_table('risk_stat',
+    sa.Column('risk_type', sa.String(length=100), nullable=False),
+    sa.Column('solucionado', sa.Boolean(), nullable=False),
+    sa.Column('week', sa.Date(), nullable=False),
+    sa.Column('post_count', sa.Integer(), nullable=False),
+    sa.Column('score_sum', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('risk_type', 'solucionado', 'week')
+    )
+
+
+def downgrade():
+    op.drop_table('risk_stat')
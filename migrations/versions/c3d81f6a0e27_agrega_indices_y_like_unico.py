@@ -0,0 +1,52 @@
+"""Agrega indices del feed y restriccion unica en Like
+
+Revision ID: c3d81f6a0e27
+Revises: 5b7e2c9d4a1f
+Create Date: 2026-10-17 11:03:58.207614
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3d81f6a0e27'
+down_revision = '5b7e2c9d4a1f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Eliminar likes duplicados antes de crear la restricción única
+    op.execute(
+        'DELETE FROM `like` WHERE id NOT IN ('
+        'SELECT id FROM (SELECT MIN(id) AS id FROM `like` GROUP BY post_id, username) AS keep_ids)'
+    )
+    op.execute(
+        'UPDATE post SET like_count = (SELECT COUNT(*) FROM `like` WHERE `like`.post_id = post.id)'
+    )
+
+    with op.batch_alter_table('like', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_like_post_username', ['post_id', 'username'])
+
+    with op.batch_alter_table('comment', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_comment_post_id'), ['post_id'], unique=False)
+
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.create_index(
+            'ix_post_feed',
+            ['solucionado', 'descripcion', 'score', 'like_count', 'id'],
+            unique=False,
+            mysql_length={'descripcion': 50},
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.drop_index('ix_post_feed')
+
+    with op.batch_alter_table('comment', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_comment_post_id'))
+
+    with op.batch_alter_table('like', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_like_post_username', type_='unique')
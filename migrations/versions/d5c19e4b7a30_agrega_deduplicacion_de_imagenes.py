@@ -0,0 +1,37 @@
+"""Agrega image_blob y post.image_hash para deduplicar imágenes
+
+Revision ID: d5c19e4b7a30
+Revises: b6e3f18a0d52
+Create Date: 2026-10-17 19:35:52.640128
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5c19e4b7a30'
+down_revision = 'b6e3f18a0d52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('image_blob',
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('sha256')
+    )
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('image_hash', sa.String(length=64), nullable=True))
+        batch_op.create_index(batch_op.f('ix_post_image_hash'), ['image_hash'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_post_image_hash'))
+        batch_op.drop_column('image_hash')
+
+    op.drop_table('image_blob')
@@ -0,0 +1,36 @@
+"""Agrega índices para ordenar el feed sin filtro de tipo de riesgo
+
+Revision ID: d8f2a7c3e416
+Revises: b19e6c4d2f70
+Create Date: 2026-10-18 00:21:37.640912
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8f2a7c3e416'
+down_revision = 'b19e6c4d2f70'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.create_index(
+            'ix_post_feed_todos', ['solucionado', 'score', 'like_count', 'id'], unique=False
+        )
+
+    with op.batch_alter_table('archived_post', schema=None) as batch_op:
+        batch_op.create_index(
+            'ix_archived_post_feed_todos', ['score', 'like_count', 'id'], unique=False
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('archived_post', schema=None) as batch_op:
+        batch_op.drop_index('ix_archived_post_feed_todos')
+
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.drop_index('ix_post_feed_todos')
@@ -0,0 +1,30 @@
+"""Agrega tabla feed_version para ETag del feed
+
+Revision ID: e91b4d7c2f08
+Revises: 7a4f0b12e9c5
+Create Date: 2026-10-17 15:41:22.904316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e91b4d7c2f08'
+down_revision = '7a4f0b12e9c5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('feed_version',
+    sa.Column('risk_type', sa.String(length=100), nullable=False),
+    sa.Column('solucionado', sa.Boolean(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('risk_type', 'solucionado')
+    )
+
+
+def downgrade():
+    op.drop_table('feed_version')
@@ -0,0 +1,79 @@
+"""Agrega post.solved_at y las tablas de archivo de reportes solucionados
+
+Revision ID: f2a86c3d9e14
+Revises: d5c19e4b7a30
+Create Date: 2026-10-17 20:22:05.917364
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2a86c3d9e14'
+down_revision = 'd5c19e4b7a30'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('solved_at', sa.DateTime(), nullable=True))
+
+    op.create_table('archived_post',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('title', sa.String(length=200), nullable=True),
+    sa.Column('image_path', sa.String(length=300), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('username', sa.String(length=50), nullable=True),
+    sa.Column('descripcion', sa.Text(), nullable=True),
+    sa.Column('score', sa.Integer(), nullable=True),
+    sa.Column('solucionado', sa.Boolean(), nullable=True),
+    sa.Column('solved_at', sa.DateTime(), nullable=True),
+    sa.Column('like_count', sa.Integer(), nullable=False),
+    sa.Column('comment_count', sa.Integer(), nullable=False),
+    sa.Column('image_renditions', sa.JSON(), nullable=True),
+    sa.Column('image_hash', sa.String(length=64), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('archived_post', schema=None) as batch_op:
+        batch_op.create_index('ix_archived_post_feed', ['descripcion', 'score', 'like_count', 'id'], unique=False, mysql_length={'descripcion': 50})
+        batch_op.create_index(batch_op.f('ix_archived_post_image_hash'), ['image_hash'], unique=False)
+
+    op.create_table('archived_like',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('post_id', sa.Integer(), nullable=True),
+    sa.Column('username', sa.String(length=50), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('archived_like', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_archived_like_post_id'), ['post_id'], unique=False)
+
+    op.create_table('archived_comment',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('post_id', sa.Integer(), nullable=True),
+    sa.Column('username', sa.String(length=50), nullable=True),
+    sa.Column('text', sa.String(length=300), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('archived_comment', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_archived_comment_post_id'), ['post_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('archived_comment', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_archived_comment_post_id'))
+
+    op.drop_table('archived_comment')
+    with op.batch_alter_table('archived_like', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_archived_like_post_id'))
+
+    op.drop_table('archived_like')
+    with op.batch_alter_table('archived_post', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_archived_post_image_hash'))
+        batch_op.drop_index('ix_archived_post_feed', mysql_length={'descripcion': 50})
+
+    op.drop_table('archived_post')
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.drop_column('solved_at')
@@ -0,0 +1,91 @@
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+# app.py lee la configuración del entorno al importarse: base SQLite y carpeta
+# de subidas temporales, caché en memoria y sin logs en consola
+_tmp = tempfile.mkdtemp(prefix="blog-tests-")
+os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(_tmp, 'test.db')}"
+os.environ["UPLOAD_FOLDER"] = _tmp
+os.environ["LOG_CONSOLE"] = "0"
+os.environ.pop("LOG_FILE", None)
+os.environ.pop("FEED_CACHE_URL", None)
+os.environ.pop("EVENTS_URL", None)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module  # noqa: E402
+from app import app as flask_app, db, feed_cache  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def app():
+    flask_app.config["TESTING"] = True
+    with flask_app.app_context():
+        db.create_all()
+    yield flask_app
+    with flask_app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+    shutil.rmtree(_tmp, ignore_errors=True)
+
+
+def _reset_database(app):
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+        db.create_all()
+    # Las claves de la caché usan ids y versiones, que vuelven a empezar
+    feed_cache.backend._data.clear()
+
+
+@pytest.fixture
+def empty_db(app):
+    """Base vacía para un test."""
+    _reset_database(app)
+
+
+@pytest.fixture(scope="module")
+def module_db(app):
+    """Base vacía compartida por los tests de un módulo."""
+    _reset_database(app)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def admin_client(client):
+    with client.session_transaction() as sess:
+        sess["username"] = "admin"
+        sess["is_admin"] = True
+    return client
+
+
+@pytest.fixture
+def image_tasks(monkeypatch):
+    """Procesa las imágenes a mano en lugar de en el pool y borra los archivos en el acto."""
+    tasks = []
+    monkeypatch.setattr(app_module, "enqueue_image_processing", lambda *task: tasks.append(task))
+    monkeypatch.setattr(app_module, "enqueue_image_deletion", app_module.delete_stored_images)
+    return tasks
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    """Almacenamiento S3 contra moto, con un bucket vacío y un cliente nuevo."""
+    from moto import mock_aws
+
+    for name, value in (
+        ("STORAGE_BACKEND", "s3"), ("S3_BUCKET", "reportes"), ("S3_REGION", "us-east-1"),
+        ("S3_ACCESS_KEY", "testing"), ("S3_SECRET_KEY", "testing"), ("S3_ENDPOINT_URL", None),
+        ("S3_PUBLIC_URL", None), ("_storage", None), ("_s3_client", None),
+    ):
+        monkeypatch.setattr(app_module, name, value)
+    with mock_aws():
+        app_module.get_s3_client().create_bucket(Bucket="reportes")
+        yield app_module.get_storage()
@@ -0,0 +1,53 @@
+"""Archivo de solucionados: los ids archivados no se reutilizan y restaurar no pisa filas activas."""
+from app import ArchivedPost, Comment, Post, app as flask_app, db
+
+
+def new_post(client, title):
+    response = client.post("/nuevo_post", data={"risk_type": "Eléctrico", "descripcion": title})
+    assert response.status_code == 302
+    with flask_app.app_context():
+        return db.session.query(Post.id).filter_by(title=title).scalar()
+
+
+def archive_all():
+    result = flask_app.test_cli_runner().invoke(args=["archive-solved", "--older-than-days", "0"])
+    assert result.exit_code == 0, result.output
+
+
+def test_new_posts_do_not_reuse_archived_ids(empty_db, admin_client):
+    archived_id = new_post(admin_client, "archivado")
+    admin_client.post(f"/comment/{archived_id}", data={"comment_text": "hilo viejo"})
+    admin_client.post(f"/marcar_solucionado/{archived_id}")
+    archive_all()
+
+    post_id = new_post(admin_client, "nuevo")
+    admin_client.post(f"/comment/{post_id}", data={"comment_text": "hilo nuevo"})
+    assert post_id != archived_id
+    page = admin_client.get("/?solucionado=si").get_data(as_text=True)
+    assert page.count(f'id="post-{archived_id}"') == 1
+
+    admin_client.post(f"/marcar_solucionado/{post_id}")
+    assert admin_client.post(f"/restore/{archived_id}").status_code == 302
+    with flask_app.app_context():
+        assert db.session.get(ArchivedPost, archived_id) is None
+        assert {c.text for c in Comment.query.filter_by(post_id=archived_id)} == {"hilo viejo"}
+        assert {c.text for c in Comment.query.filter_by(post_id=post_id)} == {"hilo nuevo"}
+
+
+def test_restore_skips_posts_whose_id_is_taken(empty_db, admin_client):
+    archived_id = new_post(admin_client, "archivado")
+    admin_client.post(f"/marcar_solucionado/{archived_id}")
+    archive_all()
+    # Como tras reiniciar MySQL 5.7: el id archivado vuelve a estar en uso
+    with flask_app.app_context():
+        db.session.add(Post(id=archived_id, title="reutilizado", username="admin", descripcion="Eléctrico"))
+        db.session.commit()
+
+    assert admin_client.post(f"/restore/{archived_id}").status_code == 302
+    result = flask_app.test_cli_runner().invoke(args=["restore-posts", str(archived_id)])
+    assert result.exit_code == 0, result.output
+    assert "Publicaciones restauradas: 0" in result.output
+    assert str(archived_id) in result.output.splitlines()[-1]
+    with flask_app.app_context():
+        assert db.session.get(ArchivedPost, archived_id) is not None
+        assert db.session.get(Post, archived_id).title == "reutilizado"
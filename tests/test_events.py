@@ -0,0 +1,28 @@
+"""Stream de eventos: ningún cliente desconectado queda suscripto."""
+from flask import session
+
+from app import broker, publish_event
+
+
+def subscribers():
+    return len(broker._subscribers)
+
+
+def test_stream_closed_before_iterating_does_not_subscribe(app, empty_db):
+    # El cliente de pruebas ya consume el primer fragmento; el servidor puede cerrar antes
+    with app.test_request_context("/stream"):
+        session["username"] = "admin"
+        response = app.view_functions["event_stream"]()
+    response.close()
+    assert subscribers() == 0
+
+
+def test_stream_unsubscribes_when_closed(empty_db, admin_client):
+    response = admin_client.get("/stream", buffered=False)
+    chunks = iter(response.response)
+    assert next(chunks) == b"retry: 5000\n\n"
+    assert subscribers() == 1
+    publish_event("like", 1, ("Eléctrico", False), likes=3)
+    assert b'"likes": 3' in next(chunks)
+    response.close()
+    assert subscribers() == 0
@@ -0,0 +1,84 @@
+"""Deduplicación de imágenes: cada publicación que usa una imagen cuenta una referencia."""
+import io
+
+from PIL import Image
+
+import app as app_module
+from app import ImageBlob, Post, app as flask_app, db, get_storage, process_post_image
+
+
+def jpeg_bytes(color=(10, 120, 200)):
+    buf = io.BytesIO()
+    Image.new("RGB", (700, 500), color).save(buf, "JPEG")
+    return buf.getvalue()
+
+
+def chunked_upload(client, data):
+    target = client.post("/uploads", json={"content_type": "image/jpeg", "size": len(data)}).get_json()
+    response = client.put(
+        target["target"]["url"], data=data,
+        headers={"Content-Range": f"bytes 0-{len(data) - 1}/{len(data)}"},
+    )
+    assert response.get_json()["complete"]
+    return target["upload_token"]
+
+
+def stored(key):
+    return get_storage().size(key) is not None
+
+
+def test_upload_token_is_single_use(empty_db, admin_client, image_tasks):
+    token = chunked_upload(admin_client, jpeg_bytes())
+    for title in ("primero", "reenviado"):
+        admin_client.post("/nuevo_post", data={"risk_type": "Eléctrico", "descripcion": title, "upload_token": token})
+    with flask_app.app_context():
+        assert [p.title for p in Post.query] == ["primero"]
+    assert len(image_tasks) == 1
+
+
+def test_posts_sharing_an_upload_get_one_reference_each(empty_db, admin_client, image_tasks):
+    # Dos publicaciones que se confirmaron a la vez con el mismo token
+    token = chunked_upload(admin_client, jpeg_bytes())
+    admin_client.post("/nuevo_post", data={"risk_type": "Eléctrico", "descripcion": "a", "upload_token": token})
+    (first_id, key), = image_tasks
+    with flask_app.app_context():
+        second = Post(title="b", image_path=key, username="admin", descripcion="Eléctrico")
+        db.session.add(second)
+        db.session.commit()
+        second_id = second.id
+
+    process_post_image(first_id, key)
+    with flask_app.app_context():
+        posts = {p.id: p for p in Post.query}
+        assert posts[first_id].image_path == posts[second_id].image_path
+        assert ImageBlob.query.one().ref_count == 2
+        renditions = app_module.image_keys(posts[second_id].image_path, posts[second_id].image_renditions)
+
+    admin_client.post(f"/delete/{first_id}")
+    with flask_app.app_context():
+        assert ImageBlob.query.one().ref_count == 1
+    assert all(stored(k) for k in renditions)
+    assert not stored(key)
+
+
+def test_oversized_images_are_discarded(empty_db, admin_client, image_tasks, monkeypatch):
+    monkeypatch.setattr(app_module, "IMAGE_MAX_DECODED_PIXELS", 5_000_000)
+    uploads = {}
+    for name, size, fmt in (("foto.jpg", (4000, 4000), "JPEG"), ("plano.png", (2300, 2300), "PNG")):
+        buf = io.BytesIO()
+        Image.new("RGB", size).save(buf, fmt)
+        buf.seek(0)
+        admin_client.post(
+            "/nuevo_post", data={"risk_type": "Eléctrico", "descripcion": name, "file": (buf, name)},
+            content_type="multipart/form-data",
+        )
+    for task in image_tasks:
+        process_post_image(*task)
+        uploads[task[0]] = task[1]
+    with flask_app.app_context():
+        posts = {p.title: p for p in Post.query}
+        # El JPEG se decodifica reducido con draft; el PNG entero superaría el límite
+        assert posts["foto.jpg"].image_renditions
+        assert posts["plano.png"].image_path is None
+        assert not stored(uploads[posts["plano.png"].id])
+        assert [b.ref_count for b in ImageBlob.query] == [1]
@@ -0,0 +1,64 @@
+"""Consultas SQL del feed: no crecen con el tamaño de la página y no ordenan en memoria."""
+import pytest
+from sqlalchemy import event
+
+from app import db, feed_cache
+
+
+@pytest.fixture(scope="module")
+def seeded(app, module_db):
+    with app.app_context():
+        result = app.test_cli_runner().invoke(args=["seed-data", "--posts", "300", "--users", "20"])
+        assert result.exit_code == 0, result.output
+
+
+def recorded_queries(app, client, path):
+    """(sentencia, parámetros) de cada consulta SQL de GET path con la caché del feed vacía."""
+    feed_cache.invalidate_all()
+    queries = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        queries.append((statement, parameters))
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = client.get(path)
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    assert response.status_code == 200
+    return queries
+
+
+@pytest.fixture
+def user_client(client):
+    with client.session_transaction() as sess:
+        sess["username"] = "usuario0"
+    return client
+
+
+@pytest.mark.parametrize("is_admin", [False, True])
+@pytest.mark.parametrize("solucionado", ["no", "si"])
+def test_feed_queries_do_not_grow_with_page_size(app, client, seeded, monkeypatch, solucionado, is_admin):
+    with client.session_transaction() as sess:
+        sess["username"] = "usuario0"
+        sess["is_admin"] = is_admin
+    counts = {}
+    for page_size in (5, 20, 100):
+        monkeypatch.setitem(app.config, "FEED_PAGE_SIZE", page_size)
+        counts[page_size] = len(recorded_queries(app, client, f"/?solucionado={solucionado}"))
+    assert len(set(counts.values())) == 1, counts
+    assert counts[5] <= 6, counts
+
+
+@pytest.mark.parametrize("risk_type", ["todos", "Eléctrico"])
+@pytest.mark.parametrize("solucionado", ["no", "si"])
+def test_feed_queries_read_in_index_order(app, user_client, seeded, solucionado, risk_type):
+    queries = recorded_queries(app, user_client, f"/?solucionado={solucionado}&risk_type={risk_type}")
+    feed_queries = [(sql, params) for sql, params in queries if "ORDER BY" in sql and ".score DESC" in sql]
+    assert feed_queries
+    with app.app_context():
+        for sql, params in feed_queries:
+            plan = [row[3] for row in db.session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params)]
+            assert not any("TEMP B-TREE" in step for step in plan), (sql, plan)
@@ -0,0 +1,59 @@
+"""Backend S3 contra moto: cliente único por proceso y subida multipart de archivos grandes."""
+import io
+import threading
+
+import boto3
+import pytest
+
+from app import get_s3_client
+
+
+@pytest.fixture
+def s3_calls(s3):
+    """Nombres de las operaciones que hace el cliente compartido."""
+    calls = []
+    get_s3_client().meta.events.register("before-call.s3", lambda model, **_: calls.append(model.name))
+    return calls
+
+
+def test_client_is_created_once_and_shared(s3, s3_calls, monkeypatch):
+    created = []
+    monkeypatch.setattr(boto3, "client", lambda *args, **kwargs: created.append(args))
+    clients = []
+    threads = [threading.Thread(target=lambda: clients.append(get_s3_client())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for i in range(3):
+        s3.save(io.BytesIO(b"x" * 10), f"uploads/{i}.jpg", "image/jpeg")
+        s3.size(f"uploads/{i}.jpg")
+    assert created == []
+    assert all(client is get_s3_client() for client in clients)
+    assert s3_calls.count("PutObject") == 3
+
+
+def test_large_files_are_sent_as_multipart(s3, s3_calls):
+    threshold = s3.transfer_config.multipart_threshold
+    s3.save(io.BytesIO(b"p" * 1024), "uploads/chica.jpg", "image/jpeg")
+    assert "CreateMultipartUpload" not in s3_calls
+    data = b"g" * (threshold + 1024 * 1024)
+    s3.save(io.BytesIO(data), "uploads/grande.jpg", "image/jpeg")
+    assert s3_calls.count("CreateMultipartUpload") == 1
+    assert s3_calls.count("UploadPart") == 2
+    assert s3_calls.count("CompleteMultipartUpload") == 1
+    with s3.open("uploads/grande.jpg") as stored:
+        assert stored.read() == data
+
+
+def test_roundtrip_listing_and_batch_delete(s3):
+    keys = [f"uploads/{i}.webp" for i in range(5)]
+    for key in keys:
+        s3.save(io.BytesIO(key.encode()), key, "image/webp")
+    assert s3.size(keys[0]) == len(keys[0])
+    assert sorted(key for key, _, _ in s3.iter_objects()) == keys
+    s3.delete_many(keys[:4])
+    assert [key for key, _, _ in s3.iter_objects()] == keys[4:]
+    assert s3.size(keys[0]) is None
+    with pytest.raises(FileNotFoundError):
+        s3.open(keys[0])
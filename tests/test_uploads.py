@@ -0,0 +1,109 @@
+"""Subidas directas: POST prefirmado a S3 (moto) y subida por partes al disco."""
+import io
+
+import pytest
+import requests
+from PIL import Image
+
+from app import Post, app as flask_app, db, get_storage
+
+
+def jpeg_bytes():
+    buf = io.BytesIO()
+    Image.new("RGB", (640, 480), (200, 40, 40)).save(buf, "JPEG")
+    return buf.getvalue()
+
+
+def request_upload(client, size, content_type="image/jpeg", filename="foto.jpg"):
+    return client.post("/uploads", json={"filename": filename, "content_type": content_type, "size": size})
+
+
+def publish(client, token, title="con imagen"):
+    client.post("/nuevo_post", data={"risk_type": "Eléctrico", "descripcion": title, "upload_token": token})
+    with flask_app.app_context():
+        return db.session.query(Post.image_path).filter_by(title=title).first()
+
+
+def presigned_post(target, data):
+    return requests.post(target["url"], data=target["fields"], files={"file": ("foto.jpg", data)})
+
+
+@pytest.mark.parametrize("content_type", ["text/html", "image/svg+xml", ""])
+def test_rejects_content_types_outside_the_allowlist(empty_db, admin_client, content_type):
+    response = request_upload(admin_client, 100, content_type)
+    assert response.status_code == 400
+
+
+def test_key_extension_comes_from_the_content_type(empty_db, admin_client, s3):
+    upload = request_upload(admin_client, 100, "image/png", filename="evil.html").get_json()
+    assert upload["target"]["fields"]["key"].endswith(".png")
+
+
+def test_presigned_post_then_nuevo_post_with_the_key(empty_db, admin_client, s3, image_tasks):
+    data = jpeg_bytes()
+    upload = request_upload(admin_client, len(data)).get_json()
+    target = upload["target"]
+    assert target["method"] == "POST"
+    assert target["fields"]["Content-Type"] == "image/jpeg"
+    assert target["fields"]["key"].startswith("uploads/") and target["fields"]["key"].endswith(".jpg")
+    assert presigned_post(target, data).status_code in (200, 204)
+    assert s3.size(target["fields"]["key"]) == len(data)
+
+    (image_path,) = publish(admin_client, upload["upload_token"])
+    assert image_path == target["fields"]["key"]
+    assert image_tasks == [(image_tasks[0][0], image_path)]
+
+
+def test_nuevo_post_checks_the_uploaded_object(empty_db, admin_client, s3, image_tasks):
+    data = jpeg_bytes()
+    # Nunca se subió
+    missing = request_upload(admin_client, len(data)).get_json()
+    assert publish(admin_client, missing["upload_token"], "sin subir") is None
+    # Se subió otra cosa que la declarada
+    truncated = request_upload(admin_client, len(data)).get_json()
+    presigned_post(truncated["target"], data[:100])
+    assert publish(admin_client, truncated["upload_token"], "incompleta") is None
+    assert image_tasks == []
+
+
+def test_upload_token_belongs_to_its_user(empty_db, admin_client, s3):
+    data = jpeg_bytes()
+    upload = request_upload(admin_client, len(data)).get_json()
+    presigned_post(upload["target"], data)
+    with admin_client.session_transaction() as sess:
+        sess["username"] = "otro"
+    assert publish(admin_client, upload["upload_token"]) is None
+
+
+def test_chunked_upload_resumes_and_rejects_wrong_ranges(empty_db, admin_client, image_tasks):
+    data = jpeg_bytes()
+    upload = request_upload(admin_client, len(data)).get_json()
+    url = upload["target"]["url"]
+    assert upload["target"]["method"] == "chunked"
+    half = len(data) // 2
+
+    response = admin_client.put(url, data=data[:half], headers={"Content-Range": f"bytes 0-{half - 1}/{len(data)}"})
+    assert response.get_json() == {"success": True, "received": half, "complete": False}
+    # Al reanudar, el cliente pregunta cuánto llegó
+    assert admin_client.get(url).get_json()["received"] == half
+    # Un trozo que no empieza donde terminó el anterior se rechaza sin escribir nada
+    response = admin_client.put(url, data=data[10:], headers={"Content-Range": f"bytes 10-{len(data) - 1}/{len(data)}"})
+    assert response.status_code == 409
+    assert response.get_json()["received"] == half
+    response = admin_client.put(url, data=data[half:], headers={"Content-Range": f"bytes {half}-{len(data) - 1}/{len(data) + 1}"})
+    assert response.status_code == 409
+
+    response = admin_client.put(url, data=data[half:], headers={"Content-Range": f"bytes {half}-{len(data) - 1}/{len(data)}"})
+    assert response.get_json() == {"success": True, "received": len(data), "complete": True}
+    (image_path,) = publish(admin_client, upload["upload_token"])
+    with get_storage().open(image_path) as stored:
+        assert stored.read() == data
+
+
+def test_chunked_upload_is_only_for_the_local_backend(empty_db, admin_client, s3):
+    upload = request_upload(admin_client, 100).get_json()
+    with flask_app.test_request_context():
+        from flask import url_for
+
+        url = url_for("upload_chunk", token=upload["upload_token"])
+    assert admin_client.get(url).status_code == 404
@@ -0,0 +1,10 @@
+"""Punto de entrada WSGI para producción.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+from app import app, preload_runtime_modules
+
+# Con preload_app el master importa acá lo que después usan todos los workers
+preload_runtime_modules()
+
+# El logging (JSON por stderr y, opcionalmente, LOG_FILE) lo configura app al importarse